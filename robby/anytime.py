@@ -0,0 +1,128 @@
+"""
+Anytime planning under a wall-clock or expansion budget.
+
+anytimeSearch runs weighted A* (f = g + w * h) with a shrinking weight w.
+Large weights find some plan quickly; every later pass only looks for plans
+shorter than the best one so far, and a pass that runs out of frontier proves
+that plan optimal. When the budget runs out, the best plan found so far is
+returned together with a proven lower bound on the optimal plan length.
+"""
+
+import heapq
+import math
+import time
+
+from robby.search import NodeStore, SearchStats
+
+# Weights of the successive weighted A* passes; the last pass is plain A*
+ANYTIME_WEIGHTS = (5.0, 3.0, 2.0, 1.5, 1.25, 1.0)
+
+
+class BudgetExhausted(Exception):
+    '''Raised inside a weighted A* pass when the time or expansion budget runs out.'''
+
+
+def anytimeSearch(problem, verbose=False, heuristic="mst", timeLimit=None, maxExpansions=None):
+    '''Return (path, stats), where path is the shortest plan found before timeLimit seconds or
+    maxExpansions expansions ran out ("" if none was found). stats.lowerBound is a proven lower
+    bound on the optimal plan length; it equals len(path) when the plan is known to be optimal, and
+    is None when no plan exists, so that stats stay valid JSON.'''
+    from robby.heuristics import HEURISTICS
+
+    stats = SearchStats("anytime")
+    start = time.perf_counter()
+    deadline = None if timeLimit is None else start + timeLimit
+    h = HEURISTICS[heuristic](problem)
+
+    path = None
+    lowerBound = h(problem.root())
+    for weight in ANYTIME_WEIGHTS:
+        incumbent = math.inf if path is None else len(path)
+        try:
+            found, bound = _weightedAStar(problem, h, weight, incumbent, stats, deadline, maxExpansions)
+        except BudgetExhausted as budget:
+            lowerBound = max(lowerBound, min(incumbent, budget.args[0]))
+            if verbose:
+                print(f"Budget ran out during the pass with weight {weight}...")
+            break
+        lowerBound = max(lowerBound, bound)
+        if found is not None:
+            path = found
+            if stats.firstSolution is None:
+                stats.firstSolution = time.perf_counter() - start
+            if verbose:
+                print(f"Found a plan of length {len(path)} with weight {weight}...")
+        if path is None and bound == math.inf or path is not None and lowerBound >= len(path):
+            break  # no plan exists, or the one we have is optimal
+
+    stats.elapsed = time.perf_counter() - start
+    stats.lowerBound = lowerBound if path is None else min(lowerBound, len(path))
+    if stats.lowerBound == math.inf:
+        stats.lowerBound = None  # proven that no plan exists
+    if verbose:
+        if stats.lowerBound is None:
+            print("--> no plan exists")
+        elif path is None:
+            print("--> no plan found; lower bound {}".format(stats.lowerBound))
+        else:
+            print("--> plan length {}, lower bound {} (gap {:.1%})".format(
+                len(path), stats.lowerBound, (len(path) - stats.lowerBound) / max(len(path), 1)))
+
+    return path or "", stats
+
+
+def _weightedAStar(problem, h, weight, incumbent, stats, deadline, maxExpansions):
+    '''Run one weighted A* pass for a plan shorter than incumbent. Return (path or None, bound), where
+    bound is a proven lower bound on the length of any plan shorter than incumbent (math.inf if
+    there is none). Raise BudgetExhausted, carrying the current lower bound, if the budget runs out.'''
+    root = problem.root()
+    nodes = NodeStore()
+    expanded = {}  # key -> (g, battery) of the last expansion of that key
+    counter = 0
+
+    # Frontier entries are (g + w * h, -g, counter, g + h, index, node)
+    frontier = []
+    hRoot = h(root)
+    if hRoot < incumbent:
+        frontier.append((weight * hRoot, 0, counter, hRoot, nodes.add(-1, " "), root))
+
+    while frontier:
+        if maxExpansions is not None and stats.expansions >= maxExpansions or \
+                deadline is not None and time.perf_counter() >= deadline:
+            raise BudgetExhausted(min(entry[3] for entry in frontier))
+
+        _, g, _, f, index, node = heapq.heappop(frontier)
+        g = -g
+        if f >= incumbent:
+            continue
+
+        # Weighted A* can reach a state again with a lower g, so a state is only skipped when an
+        # earlier expansion of it had no more g and at least as much battery
+        key = problem.key(node)
+        seen = expanded.get(key)
+        if seen is not None and seen[0] <= g and seen[1] >= node[1]:
+            if seen[1] == node[1]:
+                stats.duplicates += 1
+            else:
+                stats.pruned += 1
+            continue
+        expanded[key] = (g, node[1])
+        stats.expansions += 1
+
+        if problem.isGoal(node):
+            # Every shorter plan must pass through a node still on the frontier
+            bound = min([g] + [entry[3] for entry in frontier])
+            return nodes.path(index), bound
+
+        for action, child in problem.successors(node):
+            hChild = h(child)
+            if g + 1 + hChild >= incumbent:
+                continue
+            counter += 1
+            heapq.heappush(frontier, (g + 1 + weight * hChild, -(g + 1), counter, g + 1 + hChild,
+                                      nodes.add(index, action), child))
+            stats.generated += 1
+        stats.peakFrontier = max(stats.peakFrontier, len(frontier))
+        stats.peakClosed = max(stats.peakClosed, len(expanded))
+
+    return None, incumbent
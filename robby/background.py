@@ -0,0 +1,108 @@
+"""
+Searches run in the background while the game window stays live.
+
+A BackgroundSearch solves a problem in a child process, so the Tk thread never
+waits on the search and can redraw at full frame rate. The child reports its
+progress through a Tracer, sending the figures down a pipe at most once per
+interval, and sends the plan and stats when it is done. With heatmap, each
+report also carries the number of expansions at every cell so far. The window collects
+them with poll() from an after() callback. cancel() kills the child's whole
+process group, so workers of parallel engines go with it, as in robby_bench.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+
+from robby.engines import solve
+from robby.trace import Tracer
+
+# Seconds between progress reports sent to the window
+PROGRESS_INTERVAL = 0.1
+
+
+class BackgroundSearch:
+    '''One solve() of problem running in a child process.
+
+    verbose and trace (file, every, first, last) are as for robby.trace.Tracer; with compare, the
+    child also runs BFS for a baseline, and with heatmap it counts expansions per cell. options are
+    passed on to robby.engines.solve().'''
+
+    def __init__(self, problem, engine="bfs", verbose=False, trace=None, compare=False, heatmap=False,
+                 interval=PROGRESS_INTERVAL, **options):
+        self.engine = engine
+        self.start = time.perf_counter()
+        self.progress = None
+        self.positions = None
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_searchAndSend, args=(sender, problem, engine, verbose, trace, compare,
+                                                                    heatmap, interval, options))
+        self.process.start()
+        sender.close()
+
+    @property
+    def running(self):
+        return self.result is None and self.error is None and not self.cancelled
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def poll(self):
+        '''Collect what the child has sent. progress holds the latest (expansions, rate, frontier, depth),
+        if any, and with heatmap, positions the latest expansions at every cell. Once the search is
+        done, result holds (path, stats, baseline, cacheCounts) and error any failure.'''
+        while self.running and self.receiver.poll():
+            try:
+                message = self.receiver.recv()
+            except EOFError:
+                message = ("error", "search process died")
+            if message[0] == "progress":
+                self.progress, self.positions = message[1:5], message[5]
+            elif message[0] == "done":
+                self.result, self.positions = message[1:5], message[5]
+            else:
+                self.error = message[1]
+            if not self.running:
+                self._stop()
+
+    def cancel(self):
+        '''Stop the search, if it is still running.'''
+        if self.running:
+            self.cancelled = True
+            self._stop()
+
+    def _stop(self):
+        # Kill the search's whole process group, so workers of parallel engines go with it
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError):
+            # No process groups (Windows), or the child has not made its own yet: kill just the child
+            self.process.kill()
+        self.process.join()
+        self.receiver.close()
+
+
+def _searchAndSend(connection, problem, engine, verbose, trace, compare, heatmap, interval, options):
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)
+
+    def progress(expansions, rate, frontier, depth):
+        connection.send(("progress", expansions, rate, frontier, depth, tracer.positions))
+
+    tracer = Tracer(*(trace or ()), console=bool(verbose), interval=interval, progress=progress,
+                    positions=[0] * problem.numCells if heatmap else None)
+    try:
+        path, stats = solve(problem, engine, tracer, **options)
+        baseline = solve(problem, "bfs")[1] if compare else None
+        cache = options.get("cache")
+        connection.send(("done", path, stats, baseline, cache and (cache.hits, cache.misses), tracer.positions))
+    except Exception as e:
+        connection.send(("error", "".join(traceback.format_exception_only(type(e), e)).strip()))
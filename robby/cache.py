@@ -0,0 +1,137 @@
+"""
+Persistent cache of solved worlds.
+
+SolutionCache keeps one small JSON file per solved problem in a directory,
+named by a hash of everything that decides the plan: grid size, start, walls,
+cans and batteries, full battery, action order, engine and engine options.
+Worlds are hashed from their bitboards, so the same world read from two files
+gets the same key. A cached plan is replayed against the problem before it is
+returned, so a stale or damaged entry is dropped instead of trusted. Entries
+past maxEntries or maxBytes are evicted least recently used first, using file
+modification times, which a hit refreshes. To avoid listing the directory on
+every put, a cache keeps a running count of its entries and bytes and only
+rescans when that count goes over a limit, or after EVICT_INTERVAL puts to
+catch up with entries added by other processes.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from robby.search import SearchStats
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "robby")
+
+# Puts between full scans of the cache directory
+EVICT_INTERVAL = 100
+
+# Fraction of maxEntries and maxBytes that eviction trims the cache down to, so that a full
+# cache is not rescanned on every put
+EVICT_LOW_WATER = 0.9
+
+
+class SolutionCache:
+    '''Plans and search stats on disk, keyed by problem, engine and options.'''
+
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, maxEntries=10000, maxBytes=None):
+        self.directory = directory
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # (entries, bytes) as of the last scan plus the puts since, or None before one
+        self._puts = 0  # puts since the last scan
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, problem, engine, **options):
+        '''Return the cache key of solving problem with the named engine and options.'''
+        fields = [problem.numRows, problem.numCols, problem.start, problem.walls, problem.cans, problem.batteries,
+                  problem.fullBattery, problem.actions, engine, sorted(options.items())]
+        return hashlib.sha256(repr(fields).encode("ascii")).hexdigest()
+
+    def get(self, key, problem):
+        '''Return the cached (path, stats) for key, or None. The path is replayed against problem
+        and the entry dropped if it does not pick up every can.'''
+        file = self._file(key)
+        start = time.perf_counter()
+        try:
+            with open(file) as f:
+                entry = json.load(f)
+            node = problem.replay(entry["path"])
+        except (OSError, ValueError, KeyError, TypeError):
+            node = None
+        if node is None or not problem.isGoal(node):
+            self._remove(file)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(file)  # mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        stats = SearchStats(entry["stats"]["engine"])
+        vars(stats).update(entry["stats"])
+        stats.cached = True
+        stats.elapsed = time.perf_counter() - start
+        return entry["path"], stats
+
+    def put(self, key, path, stats):
+        '''Store a plan and its stats under key, then evict old entries if the cache is too big.'''
+        file = self._file(key)
+        temporary = f"{file}.{os.getpid()}.tmp"
+        text = json.dumps({"path": path, "stats": stats.asDict()})
+        with open(temporary, "w") as f:
+            f.write(text)
+        added = not os.path.exists(file)
+        os.replace(temporary, file)  # readers never see a half-written entry
+        self._puts += 1
+        if self._size is None or self._puts >= EVICT_INTERVAL:
+            self.evict()
+            return
+        count, size = self._size[0] + added, self._size[1] + len(text)
+        self._size = (count, size)
+        if self._overLimits(count, size):
+            self.evict()
+
+    def evict(self):
+        '''Remove least recently used entries if the cache is over maxEntries or maxBytes, down to
+        EVICT_LOW_WATER of them.'''
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    info = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, name))
+        entries.sort()
+        count, size = len(entries), sum(entry[1] for entry in entries)
+        fraction = EVICT_LOW_WATER if self._overLimits(count, size) else 1
+        for mtime, entrySize, name in entries:
+            if not self._overLimits(count, size, fraction):
+                break
+            self._remove(os.path.join(self.directory, name))
+            count, size = count - 1, size - entrySize
+        self._size, self._puts = (count, size), 0
+
+    def clear(self):
+        '''Remove every entry.'''
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.directory, name))
+        self._size, self._puts = (0, 0), 0
+
+    def _overLimits(self, count, size, fraction=1):
+        return self.maxEntries is not None and count > self.maxEntries * fraction or \
+            self.maxBytes is not None and size > self.maxBytes * fraction
+
+    def _file(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _remove(self, file):
+        try:
+            os.remove(file)
+        except OSError:
+            pass  # already gone, perhaps evicted by another process
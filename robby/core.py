@@ -0,0 +1,292 @@
+"""
+Headless core of the Robby the Robot simulator.
+
+WorldModel holds everything about Robby's world that does not need a window:
+grid contents, Robby's position, battery life, score and cost, and the rules
+for performing actions. The Tk World in robby.world is a view layered on top
+of it, so search and simulation code can use WorldModel without a display.
+"""
+
+import random
+
+POSSIBLE_ACTIONS = ["MoveNorth", "MoveSouth", "MoveEast", "MoveWest", "PickUp"]
+MOVE_DIRECTIONS = {"MoveNorth": "N", "MoveSouth": "S", "MoveEast": "E", "MoveWest": "W"}
+
+
+def readWorld(file):
+    '''Read a world file and return (rows, cols, startRow, startCol, contents).'''
+    with open(file, "r") as f:
+        lines = f.readlines()
+    rows, cols = [int(char) for char in lines[0].strip().split(" ")]
+    r0, c0 = [int(char) for char in lines[1].strip().split(" ")]
+    contents = "".join([line.strip() for line in lines[2:]]).replace(".", "E")
+    return rows, cols, r0, c0, contents
+
+
+def writeWorld(file, rows, cols, r0, c0, contents):
+    '''Write a world to a file in the format readWorld reads.'''
+    with open(file, "w") as f:
+        f.write(f"{rows} {cols}\n{r0} {c0}\n")
+        for r in range(rows):
+            f.write(contents[r * cols:(r + 1) * cols].replace("E", ".") + "\n")
+
+
+def loadWorld(file, battery=None):
+    '''Read a world file into a WorldModel with Robby at the start position (and, optionally, a full battery).
+    Raises ValueError if the contents do not fill the grid.'''
+    rows, cols, r0, c0, contents = readWorld(file)
+    if len(contents) != rows * cols:  # checked here, as load() only prints an error
+        raise ValueError(f"{file}: {len(contents)} cells of contents for a {rows}x{cols} world")
+    world = WorldModel(rows, cols)
+    world.load(contents)
+    world.goto(r0, c0)
+    if battery is not None:
+        world.setFullBattery(battery)
+    return world
+
+
+def moveTable(rows, cols, contents):
+    '''Return the transition table of a world: for each direction "N", "E", "S" and "W", a list
+    giving the cell (row * cols + col) that a move from each cell ends up in, or -1 if the move
+    is blocked by the edge of the world or a wall.'''
+    moves = {"N": [-1] * (rows * cols), "E": [-1] * (rows * cols),
+             "S": [-1] * (rows * cols), "W": [-1] * (rows * cols)}
+    for r in range(rows):
+        for c in range(cols):
+            cell = r * cols + c
+            if r > 0 and contents[cell - cols] != "W":
+                moves["N"][cell] = cell - cols
+            if c < cols - 1 and contents[cell + 1] != "W":
+                moves["E"][cell] = cell + 1
+            if r < rows - 1 and contents[cell + cols] != "W":
+                moves["S"][cell] = cell + cols
+            if c > 0 and contents[cell - 1] != "W":
+                moves["W"][cell] = cell - 1
+    return moves
+
+
+class WorldModel:
+    def __init__(self, rows, cols):
+        self.numRows = rows
+        self.numCols = cols
+        self.topRow = 0
+        self.bottomRow = rows - 1
+        self.leftCol = 0
+        self.rightCol = cols - 1
+
+        # Contents of every cell ("E", "C", "W" or "B"), stored row by row
+        self.cells = ["E"] * (rows * cols)
+        self.moves = None  # transition table, rebuilt on demand whenever the walls change
+
+        # Set Robby's current position
+        self.robbyRow = 0
+        self.robbyCol = 0
+
+        # Create parameters to track score, cost, and battery life
+        self.score = 0
+        self.cost = 0
+        self.fullBattery = rows * cols
+        self.batteryLife = self.fullBattery
+
+        self.costPerAction = 1
+        self.costPerCrash = 10
+        self.scorePerCan = 1
+        self.scorePerBattery = 0
+
+        # Initialize a parameter of initial contents (used to remember when contents are loaded from file)
+        self.originalContents = None
+
+    # Hooks for views layered over the model; the headless model ignores them.
+    def _cellChanged(self, row, col):
+        pass
+
+    def _robbyLeaving(self, row, col):
+        pass
+
+    def _crashed(self, action):
+        pass
+
+    def _statsChanged(self):
+        pass
+
+    def getContents(self, row, col):
+        return self.cells[row * self.numCols + col]
+
+    def setContents(self, row, col, newContents):
+        assert newContents in ["E", "C", "W", "B"]
+        cell = row * self.numCols + col
+        if (self.cells[cell] == "W") != (newContents == "W"):
+            self.moves = None
+        self.cells[cell] = newContents
+        self._cellChanged(row, col)
+
+    def getMoves(self):
+        '''Return the transition table of the world (see moveTable).'''
+        if self.moves is None:
+            self.moves = moveTable(self.numRows, self.numCols, self.cells)
+        return self.moves
+
+    def distributeBatteries(self, density=0.50):
+        for r in range(self.numRows):
+            for c in range(self.numCols):
+                if random.uniform(0, 1) < density:
+                    self.setContents(r, c, "B")
+
+    def distributeCans(self, density=0.50):
+        for r in range(self.numRows):
+            for c in range(self.numCols):
+                if random.uniform(0, 1) < density:
+                    self.setContents(r, c, "C")
+
+    def distributeWalls(self, density=0.50):
+        for r in range(self.numRows):
+            for c in range(self.numCols):
+                if random.uniform(0, 1) < density and not (r == self.robbyRow and c == self.robbyCol):
+                    self.setContents(r, c, "W")
+
+    def _gridContents(self):
+        return "".join(self.cells)
+
+    def performAction(self, action):
+        # Check if desired action is possible
+        if action not in POSSIBLE_ACTIONS:
+            print("ERROR -- possible actions are:\n%s" % POSSIBLE_ACTIONS)
+
+        # Moves look up their destination in the transition table; -1 means a crash
+        # into the edge of the world or a wall
+        elif action in MOVE_DIRECTIONS:
+            cell = self.getMoves()[MOVE_DIRECTIONS[action]][self.robbyRow * self.numCols + self.robbyCol]
+            if cell < 0:
+                self._crashed(action)
+                self.cost += self.costPerCrash
+                self.batteryLife -= self.costPerCrash
+            else:
+                self._robbyLeaving(self.robbyRow, self.robbyCol)
+                self.robbyRow, self.robbyCol = divmod(cell, self.numCols)
+                self.cost += self.costPerAction
+                self.batteryLife -= self.costPerAction
+                self._cellChanged(self.robbyRow, self.robbyCol)
+
+        # Pick up whatever is in Robby's cell
+        else:
+            self._robbyLeaving(self.robbyRow, self.robbyCol)
+            if action == "PickUp":
+                if self.getContents(self.robbyRow, self.robbyCol) == "B":
+                    self.score += self.scorePerBattery
+                    self.cost += self.costPerAction
+                    self.batteryLife = self.fullBattery
+                elif self.getContents(self.robbyRow, self.robbyCol) == "C":
+                    self.score += self.scorePerCan
+                    self.cost += self.costPerAction
+                    self.batteryLife -= self.costPerAction
+                self.setContents(self.robbyRow, self.robbyCol, "E")
+            else:
+                raise Exception("bad action: %s" % action) # should never happen
+            self._cellChanged(self.robbyRow, self.robbyCol)
+
+        self._statsChanged()
+        return 1
+
+    def north(self):
+        return self.performAction("MoveNorth")
+
+    def south(self):
+        return self.performAction("MoveSouth")
+
+    def east(self):
+        return self.performAction("MoveEast")
+
+    def west(self):
+        return self.performAction("MoveWest")
+
+    def grab(self):
+        return self.performAction("PickUp")
+
+    def look(self):
+        return self.getPercept()
+
+    def getCansRemaining(self):
+        '''Return the number of cans remaining in the world.'''
+        return self.cells.count("C")
+
+    def getCurrentPosition(self):
+        return self.robbyRow, self.robbyCol
+
+    def getPercept(self):
+        '''Get the contents of the neighboring cells returned as a dictionary. The keys include Robby and the
+        principal directions that can be searched.'''
+        percept = {}
+        percept['Robby'] = self.getContents(self.robbyRow, self.robbyCol)
+        percept['North'] = "W" if self.robbyRow == self.topRow else self.getContents(self.robbyRow - 1, self.robbyCol)
+        percept['South'] = "W" if self.robbyRow == self.bottomRow else self.getContents(self.robbyRow + 1, self.robbyCol)
+        percept['East'] = "W" if self.robbyCol == self.rightCol else self.getContents(self.robbyRow, self.robbyCol + 1)
+        percept['West'] = "W" if self.robbyCol == self.leftCol else self.getContents(self.robbyRow, self.robbyCol - 1)
+        return percept
+
+    def getState(self):
+        '''Get the current state of the environment, encoded as a string.'''
+        state = ""
+        for r in range(self.numRows):
+            for c in range(self.numCols):
+                if r == self.robbyRow and c == self.robbyCol:
+                    state += "R" + self.getContents(r, c)
+                else:
+                    state += self.getContents(r, c) + " "
+        return state
+
+    def goto(self, row, col):
+        '''Move Robby directly to a specific row and column.'''
+        assert 0 <= row < self.numRows and 0 <= col < self.numCols
+        self._robbyLeaving(self.robbyRow, self.robbyCol)
+        self.robbyRow = row
+        self.robbyCol = col
+        self._cellChanged(self.robbyRow, self.robbyCol)
+
+    def load(self, contents):
+        '''Load environment setup from a string of contents.'''
+        # Check to make sure the contents are valid
+        rows, cols = self.numRows, self.numCols
+        if len(contents) != rows * cols:
+            print(f"ERROR -- invalid grid contents for size ({rows}, {cols}): {contents}")
+            return 0
+
+        # Set contents in the world
+        for r in range(rows):
+            for c in range(cols):
+                self.setContents(r, c, contents[r * cols + c])
+
+        # Store the original contents for potential re-loading in the future
+        self.originalContents = contents
+
+    def reset(self):
+        '''Reset the world contents, score, cost, and battery life.'''
+        if self.originalContents is not None:
+            self.load(self.originalContents)
+        self.score = 0
+        self.cost = 0
+        self.batteryLife = self.fullBattery
+
+    def setFullBattery(self, battery):
+        '''Update the power in a full battery.'''
+        self.fullBattery = battery
+        self.batteryLife = battery
+
+    def show(self):
+        '''Display the current state of Robby's world at the command line.'''
+        s = "\n"
+        for r in range(self.numRows):
+            for c in range(self.numCols):
+                contents = self.getContents(r, c)
+                if r == self.robbyRow and c == self.robbyCol:
+                    if contents == "B":
+                        s += "RB "
+                    elif contents == "C":
+                        s += "RC "
+                    elif contents == "W":
+                        s += "RW " # this should never happen!
+                    else:
+                        s += "R  "
+                else:
+                    s += ".  " if contents == "E" else contents + "  "
+            s += "\n"
+        print(s)
@@ -0,0 +1,82 @@
+"""
+Registry of the search engines offered by robby_search.py.
+
+Every engine takes a SearchProblem and verbose=, plus the options of the sets
+below it belongs to, and returns (path, stats), where path is a plain
+N/E/S/W/G string and stats a SearchStats.
+"""
+
+from robby.anytime import anytimeSearch
+from robby.external import externalBreadthFirstSearch
+from robby.parallel import parallelBreadthFirstSearch
+from robby.poi import heldKarpSearch, macroSearch
+from robby.search import TimedProblem, aStarSearch, breadthFirstSearch, idaStarSearch, iterativeDeepeningSearch
+
+# Search engines by name, as offered on the command line
+ENGINES = {
+    "bfs": breadthFirstSearch,
+    "pbfs": parallelBreadthFirstSearch,
+    "ebfs": externalBreadthFirstSearch,
+    "astar": aStarSearch,
+    "macro": macroSearch,
+    "heldkarp": heldKarpSearch,
+    "iddfs": iterativeDeepeningSearch,
+    "idastar": idaStarSearch,
+    "anytime": anytimeSearch,
+}
+
+# Engines that take a heuristic= option naming an entry of robby.heuristics.HEURISTICS
+INFORMED_ENGINES = {"astar", "macro", "heldkarp", "idastar", "anytime"}
+
+# Engines that take a tableSize= option bounding their transposition table (0 for none)
+TABLE_ENGINES = {"iddfs", "idastar"}
+
+# Engines that take timeLimit= (seconds) and maxExpansions= options and return the best plan found so far
+BUDGET_ENGINES = {"anytime"}
+
+# Engines that take a workers= option giving the number of worker processes (None for one per core)
+PARALLEL_ENGINES = {"pbfs"}
+
+# Engines that take a memoryLimit= option giving the bytes of states they may buffer in memory
+EXTERNAL_ENGINES = {"ebfs"}
+
+# Engines that report their expansions to a robby.trace.Tracer given as verbose=
+TRACED_ENGINES = {"bfs", "astar", "macro", "iddfs", "idastar"}
+
+
+def solve(problem, engine="bfs", verbose=False, heuristic="mst", tableSize=0, timeLimit=None, maxExpansions=None,
+          workers=None, memoryLimit=None, profile=False, cache=None):
+    '''Run the named engine on problem, passing along only the options it takes, and return (path, stats).
+    timeLimit is in seconds. With profile, stats also splits the time spent on successor generation,
+    hashing and goal tests, at the cost of a slower search. With a robby.cache.SolutionCache, a plan
+    cached for the same problem, engine and options is returned instead of searching, and new plans
+    are added to the cache.'''
+    options = {}
+    if engine in INFORMED_ENGINES:
+        options["heuristic"] = heuristic
+    if engine in TABLE_ENGINES:
+        options["tableSize"] = tableSize
+    if engine in BUDGET_ENGINES:
+        options["timeLimit"] = timeLimit
+        options["maxExpansions"] = maxExpansions
+    if engine in PARALLEL_ENGINES:
+        options["workers"] = workers
+    if engine in EXTERNAL_ENGINES and memoryLimit is not None:
+        options["memoryLimit"] = memoryLimit
+    if cache is not None:
+        key = cache.key(problem, engine, **options)
+        cached = cache.get(key, problem)
+        if cached is not None:
+            return cached
+
+    if not profile:
+        path, stats = ENGINES[engine](problem, verbose=verbose, **options)
+    else:
+        timed = TimedProblem(problem)
+        path, stats = ENGINES[engine](timed, verbose=verbose, **options)
+        stats.successorTime, stats.hashTime, stats.goalTime = timed.successorTime, timed.hashTime, timed.goalTime
+
+    # Only plans are cached: a failed search cannot be checked when it is loaded again
+    if cache is not None and (path or problem.isGoal(problem.root())):
+        cache.put(key, path, stats)
+    return path, stats
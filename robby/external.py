@@ -0,0 +1,218 @@
+"""
+Breadth-first search with its layers on disk.
+
+externalBreadthFirstSearch keeps only a bounded buffer of states in memory.
+Every state is a packed fixed-width record whose bytes sort in key order, most
+battery first:
+
+    key (SearchProblem.key(), big-endian) | 0xFFFFFFFF - battery | parent | action
+
+Each layer is generated into sorted runs of at most memoryLimit bytes, and the
+runs are merged back in one sorted stream. Duplicate detection is delayed to
+that merge: the stream is joined against the sorted file of every state seen
+so far (key and battery only), so a state is kept only if no state with its key
+had as much battery, as in ClosedSet. Kept states become the next layer file;
+the parent field is the index of the parent record in the previous layer file,
+so the path is rebuilt at the end by seeking backwards through the layers.
+"""
+
+import heapq
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from robby.search import SearchStats
+
+# Bytes of memory a search may hold in buffered records unless told otherwise
+EXTERNAL_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# Most sorted runs merged at once; more runs are first merged in groups of this many
+MERGE_FAN_IN = 64
+
+# Bytes read from a record file at a time
+READ_CHUNK = 64 * 1024
+
+_TAIL = struct.Struct(">Iqc")  # 0xFFFFFFFF - battery, parent index, action
+
+
+def externalBreadthFirstSearch(problem, verbose=False, memoryLimit=EXTERNAL_MEMORY_LIMIT, directory=None):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by a
+    breadth-first search that keeps its layers in temporary files under directory (default:
+    the system temporary directory) and at most memoryLimit bytes of records in memory, or ""
+    if there is none.'''
+    stats = SearchStats("ebfs")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="robby-", dir=directory) as workspace:
+        path = _LayeredSearch(problem, workspace, memoryLimit, stats, verbose).run()
+    stats.elapsed = time.perf_counter() - start
+    if verbose:
+        print("--> searched {} paths".format(stats.expansions))
+    return path, stats
+
+
+class _LayeredSearch:
+    '''The files and record layout of one run of externalBreadthFirstSearch.'''
+
+    def __init__(self, problem, workspace, memoryLimit, stats, verbose):
+        self.problem = problem
+        self.workspace = workspace
+        self.stats = stats
+        self.verbose = verbose
+        self.files = 0
+
+        # Keys never exceed the one with every item still in the world
+        self.keyWidth = ((problem.cans | problem.batteries) * problem.numCells + problem.numCells).bit_length() // 8 + 1
+        self.visitedWidth = self.keyWidth + 4
+        self.recordWidth = self.keyWidth + _TAIL.size
+
+        # Count the per-object overhead of a buffered record against the limit, not just its bytes
+        self.bufferSize = max(1, memoryLimit // (sys.getsizeof(bytes(self.recordWidth)) + 8))
+
+    def run(self):
+        problem = self.problem
+        root = problem.root()
+        layers = [self._newFile()]
+        visited = self._newFile()
+        with open(layers[0], "wb") as f:
+            f.write(self._encode(root, -1, " "))
+        with open(visited, "wb") as f:
+            f.write(self._encode(root, -1, " ")[:self.visitedWidth])
+        if problem.isGoal(root):
+            return ""
+
+        while True:
+            runs = self._expand(layers[-1])
+            layer, nextVisited = self._newFile(), self._newFile()
+            with open(layer, "wb") as layerOut, open(nextVisited, "wb") as visitedOut:
+                accepted, goal = self._merge(self._sorted(runs), self._read(visited, self.visitedWidth),
+                                             layerOut, visitedOut)
+            os.remove(visited)
+            visited = nextVisited
+            layers.append(layer)
+            self.stats.generated += accepted
+            self.stats.peakFrontier = max(self.stats.peakFrontier, accepted)
+            self.stats.peakClosed += accepted
+            if self.verbose:
+                print(f"Searched layer {len(layers) - 1} ({accepted} new states)...")
+            if goal is not None:
+                return self._path(layers, goal)
+            if not accepted:
+                return ""
+
+    def _newFile(self):
+        self.files += 1
+        return os.path.join(self.workspace, f"{self.files}.bin")
+
+    def _encode(self, node, parent, action):
+        '''Pack a node reached from record parent of the previous layer by action into a record.'''
+        return self.problem.key(node).to_bytes(self.keyWidth, "big") + \
+            _TAIL.pack(0xFFFFFFFF - node[1], parent, action.encode("ascii"))
+
+    def _decode(self, record):
+        '''Return the node stored in a record.'''
+        problem = self.problem
+        items, pos = divmod(int.from_bytes(record[:self.keyWidth], "big"), problem.numCells)
+        battery = 0xFFFFFFFF - int.from_bytes(record[self.keyWidth:self.visitedWidth], "big")
+        # Items only ever disappear, so the original boards tell the cans from the batteries
+        return (pos, battery, items & problem.cans, items & problem.batteries)
+
+    def _read(self, file, width):
+        '''Yield the records of a file of width-byte records in order.'''
+        chunk = max(width, READ_CHUNK - READ_CHUNK % width)
+        with open(file, "rb") as f:
+            while True:
+                data = f.read(chunk)
+                if not data:
+                    return
+                for offset in range(0, len(data), width):
+                    yield data[offset:offset + width]
+
+    def _writeRun(self, records):
+        '''Sort records into a new run file and return its name.'''
+        records.sort()
+        run = self._newFile()
+        with open(run, "wb") as f:
+            f.write(b"".join(records))
+        return run
+
+    def _expand(self, layer):
+        '''Expand every state of a layer file and return the sorted run files of their children.'''
+        problem = self.problem
+        runs, buffer = [], []
+        for index, record in enumerate(self._read(layer, self.recordWidth)):
+            self.stats.expansions += 1
+            for action, child in problem.successors(self._decode(record)):
+                buffer.append(self._encode(child, index, action))
+                if len(buffer) >= self.bufferSize:
+                    runs.append(self._writeRun(buffer))
+                    buffer = []
+        if buffer or not runs:
+            runs.append(self._writeRun(buffer))
+        return runs
+
+    def _sorted(self, runs):
+        '''Yield the records of sorted run files in order, merging at most MERGE_FAN_IN at a time.'''
+        while len(runs) > MERGE_FAN_IN:
+            group, runs = runs[:MERGE_FAN_IN], runs[MERGE_FAN_IN:]
+            merged = self._newFile()
+            with open(merged, "wb") as f:
+                for record in heapq.merge(*[self._read(run, self.recordWidth) for run in group]):
+                    f.write(record)
+            for run in group:
+                os.remove(run)
+            runs.append(merged)
+        yield from heapq.merge(*[self._read(run, self.recordWidth) for run in runs])
+        for run in runs:
+            os.remove(run)
+
+    def _merge(self, candidates, visited, layerOut, visitedOut):
+        '''Join sorted candidate records against the sorted visited records. Write the candidates
+        that no visited state dominates to layerOut, and the updated visited records to visitedOut.
+        Return (accepted, goal), where goal is the index of the first goal written or None.'''
+        width = self.keyWidth
+        accepted, goal, lastKey, lastBattery = 0, None, None, None
+        seen = next(visited, None)
+        for record in candidates:
+            key = record[:width]
+            # The first record of a key carries the most battery; the rest are dominated by it
+            if key == lastKey:
+                if record[width:self.visitedWidth] == lastBattery:
+                    self.stats.duplicates += 1
+                else:
+                    self.stats.pruned += 1
+                continue
+            lastKey, lastBattery = key, record[width:self.visitedWidth]
+            while seen is not None and seen[:width] < key:
+                visitedOut.write(seen)
+                seen = next(visited, None)
+            if seen is not None and seen[:width] == key:
+                # A state seen earlier with at least as much battery dominates this one
+                if seen[width:] == record[width:self.visitedWidth]:
+                    self.stats.duplicates += 1
+                    continue
+                if seen[width:] < record[width:self.visitedWidth]:
+                    self.stats.pruned += 1
+                    continue
+                seen = next(visited, None)
+            layerOut.write(record)
+            visitedOut.write(record[:self.visitedWidth])
+            if goal is None and self.problem.isGoal(self._decode(record)):
+                goal = accepted
+            accepted += 1
+        while seen is not None:
+            visitedOut.write(seen)
+            seen = next(visited, None)
+        return accepted, goal
+
+    def _path(self, layers, index):
+        '''Rebuild the action string leading to record index of the last layer.'''
+        actions = []
+        for layer in reversed(layers[1:]):
+            with open(layer, "rb") as f:
+                f.seek(index * self.recordWidth)
+                record = f.read(self.recordWidth)
+            battery, index, action = _TAIL.unpack(record[self.keyWidth:])
+            actions.append(action)
+        return b"".join(reversed(actions)).decode("ascii")
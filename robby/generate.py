@@ -0,0 +1,99 @@
+"""
+Fast, seeded generation of Robby's worlds without a window.
+
+A world is sampled in one pass: a single randbytes() call draws a byte per
+cell, and bytes.translate() maps every byte to a wall, can, battery or empty
+cell through a 256-entry table built from the densities. Densities therefore
+have a resolution of 1/256. Reachability is a flood fill over bitboards that
+grows the whole frontier with four shifts per step.
+"""
+
+import random
+
+from robby.core import WorldModel
+from robby.search import SearchProblem, bitboard, bits
+
+
+def generateWorld(rows, cols, walls=0.1, cans=0.2, batteries=0.05, seed=None, start=None, reachable=False,
+                  battery=None, engine="astar", attempts=100):
+    '''Return (rows, cols, startRow, startCol, contents) of a random world, where every cell is a wall,
+    can or battery with the given probabilities. seed is a number or a random.Random to draw from.
+
+    Robby starts at start (row, col), or on a random cell that is not a wall. With reachable, cans and
+    batteries Robby cannot walk to are removed. With a battery, worlds are drawn until one can be
+    solved with that full battery, raising ValueError after attempts tries.'''
+    if walls + cans + batteries > 1:
+        raise ValueError("walls, cans and batteries densities add up to more than 1")
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    table = _contentsTable(walls, cans, batteries)
+    for attempt in range(attempts if battery is not None else 1):
+        contents = rng.randbytes(rows * cols).translate(table).decode("ascii")
+        if start is None:
+            free = [cell for cell, value in enumerate(contents) if value != "W"]
+            r0, c0 = divmod(rng.choice(free or range(rows * cols)), cols)
+        else:
+            r0, c0 = start
+        if contents[r0 * cols + c0] == "W":
+            contents = contents[:r0 * cols + c0] + "E" + contents[r0 * cols + c0 + 1:]
+        if reachable or battery is not None:
+            contents = _clearUnreachable(rows, cols, r0 * cols + c0, contents)
+        if battery is None or isSolvable(rows, cols, r0, c0, contents, battery, engine):
+            return rows, cols, r0, c0, contents
+    raise ValueError(f"no solvable world found in {attempts} attempts")
+
+
+def generateWorlds(count, rows, cols, seed=None, **options):
+    '''Yield count worlds (see generateWorld), all drawn from one generator seeded with seed.'''
+    rng = random.Random(seed)
+    for i in range(count):
+        yield generateWorld(rows, cols, seed=rng, **options)
+
+
+def isSolvable(rows, cols, r0, c0, contents, battery, engine="astar"):
+    '''Return True if Robby can pick up every can of the world with the given full battery.'''
+    from robby.engines import solve
+
+    world = WorldModel(rows, cols)
+    world.load(contents)
+    world.goto(r0, c0)
+    problem = SearchProblem(world, contents, battery=battery)
+    path, stats = solve(problem, engine)
+    return len(path) > 0 or problem.cans == 0
+
+
+def reachableCells(rows, cols, start, contents):
+    '''Return the bitboard of the cells Robby can walk to from cell start, walls being the only obstacles.'''
+    cells = (1 << rows * cols) - 1
+    free = cells & ~bitboard(contents, "W")
+    # Columns a move east or west must not wrap into
+    firstCol = sum(1 << r * cols for r in range(rows))
+    notFirstCol = cells & ~firstCol
+    notLastCol = cells & ~(firstCol << cols - 1)
+    reached, frontier = 0, 1 << start
+    while frontier:
+        reached |= frontier
+        grown = frontier << cols | frontier >> cols | (frontier << 1) & notFirstCol | (frontier >> 1) & notLastCol
+        frontier = grown & free & ~reached
+    return reached
+
+
+def _contentsTable(walls, cans, batteries):
+    '''Return the bytes.translate() table mapping a random byte to a cell's contents.'''
+    table = bytearray(b"E" * 256)
+    edge = 0
+    for item, density in (("W", walls), ("C", cans), ("B", batteries)):
+        top = min(256, edge + round(density * 256))
+        table[edge:top] = item.encode("ascii") * (top - edge)
+        edge = top
+    return bytes(table)
+
+
+def _clearUnreachable(rows, cols, start, contents):
+    '''Empty every can and battery that Robby cannot walk to from cell start.'''
+    unreachable = (bitboard(contents, "C") | bitboard(contents, "B")) & ~reachableCells(rows, cols, start, contents)
+    if not unreachable:
+        return contents
+    cells = list(contents)
+    for cell in bits(unreachable):
+        cells[cell] = "E"
+    return "".join(cells)
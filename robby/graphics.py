@@ -161,6 +161,7 @@ __version__ = "5.0beta"
 #     Added Entry boxes.
 
 import time, os, sys
+from contextlib import contextmanager
 
 try:  # import as appropriate for 2.x vs. 3.x
    import tkinter as tk
@@ -208,7 +209,7 @@ class GraphWin(tk.Canvas):
     """A GraphWin is a toplevel window for displaying graphics."""
 
     def __init__(self, title="Graphics Window",
-                 width=200, height=200, autoflush=True):
+                 width=200, height=200, autoflush=True, frameRate=None):
         assert type(title) == type(""), "Title must be a string"
         master = tk.Toplevel(_root)
         master.protocol("WM_DELETE_WINDOW", self.close)
@@ -218,7 +219,6 @@ class GraphWin(tk.Canvas):
         self.pack()
         master.resizable(0,0)
         self.foreground = "black"
-        self.items = []
         self.mouseX = None
         self.mouseY = None
         self.bind("<Button-1>", self._onClick)
@@ -226,7 +226,14 @@ class GraphWin(tk.Canvas):
         self.height = int(height)
         self.width = int(width)
         self.autoflush = autoflush
+        self.frameRate = frameRate
+        self.batching = 0
+        self.lastFlush = 0
+        self.flushPending = False
+        self.looping = False
+        self.items = {}
         self._mouseCallback = None
+        self._keyCallback = None
         self.trans = None
         self.closed = False
         master.lift()
@@ -263,13 +270,15 @@ class GraphWin(tk.Canvas):
             c = 'Ctrl+' + c
 
         self.lastKey = c
+        if self._keyCallback:
+            self._keyCallback(c)
 
 
     def setBackground(self, color):
         """Set background color of the window"""
         self.__checkOpen()
         self.config(bg=color)
-        self.__autoflush()
+        self._autoflush()
 
     def setCoords(self, x1, y1, x2, y2):
         """Set coordinates of window to run from (x1,y1) in the
@@ -283,7 +292,9 @@ class GraphWin(tk.Canvas):
         if self.closed: return
         self.closed = True
         self.master.destroy()
-        self.__autoflush()
+        if self.looping:
+            _root.quit() # end this window's mainloop()
+        self._autoflush()
 
 
     def isClosed(self):
@@ -294,9 +305,47 @@ class GraphWin(tk.Canvas):
         return not self.closed
 
 
-    def __autoflush(self):
-        if self.autoflush:
-            _root.update()
+    def _autoflush(self):
+        # Called after every change to the window. With a frameRate, changes
+        # are flushed at most that many times a second: one that comes too soon
+        # is left for a flush scheduled at the end of the frame. Inside batch(),
+        # nothing is flushed until the batch ends.
+        if not self.autoflush or self.batching:
+            return
+        if self.frameRate:
+            now = time.time()
+            wait = 1 / self.frameRate - (now - self.lastFlush)
+            if wait > 0:
+                if not self.flushPending:
+                    self.flushPending = True
+                    self.after(max(1, int(wait * 1000)), self._endFrame)
+                return
+            self.lastFlush = now
+        _root.update()
+
+    def _endFrame(self):
+        # Draw the changes held back during the frame that just ended
+        self.flushPending = False
+        if not self.closed:
+            self.lastFlush = time.time()
+            self.update_idletasks()
+
+    def setFrameRate(self, rate):
+        """Flush changes at most rate times a second (None: after every change)"""
+        self.frameRate = rate
+
+    @contextmanager
+    def batch(self):
+        """Context manager that holds back all changes made inside it and
+        flushes them to the window once at the end"""
+        self.batching += 1
+        try:
+            yield self
+        finally:
+            self.batching -= 1
+            if not self.batching and self.autoflush and not self.closed:
+                self.lastFlush = time.time()
+                _root.update()
 
 
     def plot(self, x, y, color="black"):
@@ -304,14 +353,14 @@ class GraphWin(tk.Canvas):
         self.__checkOpen()
         xs,ys = self.toScreen(x,y)
         self.create_line(xs,ys,xs+1,ys, fill=color)
-        self.__autoflush()
+        self._autoflush()
 
     def plotPixel(self, x, y, color="black"):
         """Set pixel raw (independent of window coordinates) pixel
         (x,y) to color"""
         self.__checkOpen()
         self.create_line(x,y,x+1,y, fill=color)
-        self.__autoflush()
+        self._autoflush()
 
     def flush(self):
         """Update drawing to the window"""
@@ -393,6 +442,22 @@ class GraphWin(tk.Canvas):
     def setMouseHandler(self, func):
         self._mouseCallback = func
 
+    def setKeyHandler(self, func):
+        """Call func with the name of every key pressed (as getKey returns it)"""
+        self._keyCallback = func
+
+    def mainloop(self):
+        """Handle events, calling the mouse and key handlers, until the window
+        is closed. Tk redraws the window whenever it is idle, so nothing is
+        flushed in between."""
+        autoflush, self.autoflush = self.autoflush, False
+        self.looping = True
+        try:
+            _root.mainloop()
+        finally:
+            self.looping = False
+            self.autoflush = autoflush
+
     def _onClick(self, e):
         self.mouseX = e.x
         self.mouseY = e.y
@@ -400,13 +465,13 @@ class GraphWin(tk.Canvas):
             self._mouseCallback(Point(e.x, e.y))
 
     def addItem(self, item):
-        self.items.append(item)
+        self.items[item] = None
 
     def delItem(self, item):
-        self.items.remove(item)
+        del self.items[item]
 
     def redraw(self):
-        for item in self.items[:]:
+        for item in list(self.items):
             item.undraw()
             item.draw(self)
         self.update()
@@ -498,8 +563,7 @@ class GraphicsObject:
         self.canvas = graphwin
         self.id = self._draw(graphwin, self.config)
         graphwin.addItem(self)
-        if graphwin.autoflush:
-            _root.update()
+        graphwin._autoflush()
         return self
 
 
@@ -512,8 +576,7 @@ class GraphicsObject:
         if not self.canvas.isClosed():
             self.canvas.delete(self.id)
             self.canvas.delItem(self)
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas._autoflush()
         self.canvas = None
         self.id = None
 
@@ -534,8 +597,7 @@ class GraphicsObject:
                 x = dx
                 y = dy
             self.canvas.move(self.id, x, y)
-            if canvas.autoflush:
-                _root.update()
+            canvas._autoflush()
 
     def _reconfig(self, option, setting):
         # Internal method for changing configuration of the object
@@ -547,8 +609,7 @@ class GraphicsObject:
         options[option] = setting
         if self.canvas and not self.canvas.isClosed():
             self.canvas.itemconfig(self.id, options)
-            if self.canvas.autoflush:
-                _root.update()
+            self.canvas._autoflush()
 
 
     def _draw(self, canvas, options):
@@ -890,6 +951,7 @@ class Image(GraphicsObject):
 
     idCount = 0
     imageCache = {} # tk photoimages go here to avoid GC while drawn
+    fileCache = {} # one tk photoimage per file, shared by every Image of it
 
     def __init__(self, p, *pixmap):
         GraphicsObject.__init__(self, [])
@@ -897,10 +959,24 @@ class Image(GraphicsObject):
         self.imageId = Image.idCount
         Image.idCount = Image.idCount + 1
         if len(pixmap) == 1: # file name provided
-            self.img = tk.PhotoImage(file=pixmap[0], master=_root)
+            self.img = Image.loadFile(pixmap[0])
+            self.shared = True
         else: # width and height provided
             width, height = pixmap
             self.img = tk.PhotoImage(master=_root, width=width, height=height)
+            self.shared = False
+
+    @staticmethod
+    def loadFile(filename):
+        """Returns the tk photoimage of filename, reading the file only
+        the first time it is asked for
+
+        """
+        key = os.path.abspath(filename)
+        img = Image.fileCache.get(key)
+        if img is None:
+            img = Image.fileCache[key] = tk.PhotoImage(file=filename, master=_root)
+        return img
 
     def __repr__(self):
         return "Image({}, {}, {})".format(self.anchor, self.getWidth(), self.getHeight())
@@ -957,6 +1033,12 @@ class Image(GraphicsObject):
         """Sets pixel (x,y) to the given color
 
         """
+        if self.shared: # copy on write, so other Images of the file keep their pixels
+            self.img = self.img.copy()
+            self.shared = False
+            if self.id:
+                self.imageCache[self.imageId] = self.img
+                self.canvas.itemconfig(self.id, image=self.img)
         self.img.put("{" + color +"}", (x, y))
 
 
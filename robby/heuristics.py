@@ -0,0 +1,84 @@
+"""
+Admissible heuristics for informed search over a SearchProblem.
+
+Each entry of HEURISTICS takes a SearchProblem and returns a function h(node)
+giving a lower bound on the number of actions left before every can is picked
+up, or math.inf if the node can no longer reach a can or battery in time.
+Distances come from SearchProblem.distancesFrom(), which ignores battery.
+All of the bounds below are consistent, which aStarSearch relies on.
+"""
+
+import math
+
+from robby.search import bits
+
+
+def _deadEnd(problem, pos, battery, cans, batteries):
+    '''Return True if Robby's battery runs out before reaching (and grabbing) any can or battery.'''
+    # With battery b, Robby can take b - 1 more actions; grabbing a can takes one of them
+    reach = battery - 1
+    for can in bits(cans):
+        if problem.distancesFrom(can)[pos] + 1 <= reach:
+            return False
+    for cell in bits(batteries):
+        if problem.distancesFrom(cell)[pos] <= reach:
+            return False
+    return True
+
+
+def zeroHeuristic(problem):
+    '''h = 0, which turns A* into uniform-cost search.'''
+    def h(node):
+        return 0
+    return h
+
+
+def farthestCanHeuristic(problem):
+    '''h = moves to the farthest remaining can + one grab per remaining can.'''
+    def h(node):
+        pos, battery, cans, batteries = node
+        if not cans:
+            return 0
+        if _deadEnd(problem, pos, battery, cans, batteries):
+            return math.inf
+        return max(problem.distancesFrom(can)[pos] for can in bits(cans)) + bin(cans).count("1")
+    return h
+
+
+def mstHeuristic(problem):
+    '''h = moves to the nearest remaining can + weight of a minimum spanning tree over the
+    remaining cans + one grab per remaining can. Any route through all the cans is at least
+    as long as the spanning tree, so the bound is admissible.'''
+    spanningTrees = {}  # MST weight by can bitboard
+
+    def spanningTree(cans):
+        if cans not in spanningTrees:
+            cells = list(bits(cans))
+            best = {cell: problem.distancesFrom(cells[0])[cell] for cell in cells[1:]}
+            weight = 0
+            while best:
+                cell = min(best, key=best.get)
+                weight += best.pop(cell)
+                distances = problem.distancesFrom(cell)
+                for other in best:
+                    best[other] = min(best[other], distances[other])
+            spanningTrees[cans] = weight
+        return spanningTrees[cans]
+
+    def h(node):
+        pos, battery, cans, batteries = node
+        if not cans:
+            return 0
+        if _deadEnd(problem, pos, battery, cans, batteries):
+            return math.inf
+        nearest = min(problem.distancesFrom(can)[pos] for can in bits(cans))
+        return nearest + spanningTree(cans) + bin(cans).count("1")
+    return h
+
+
+# Heuristics by name, as offered on the command line
+HEURISTICS = {
+    "zero": zeroHeuristic,
+    "farthest": farthestCanHeuristic,
+    "mst": mstHeuristic,
+}
@@ -0,0 +1,162 @@
+"""
+Level-synchronous breadth-first search across worker processes.
+
+Every state is owned by exactly one worker, chosen by a hash of its
+SearchProblem.key(). Each worker holds the closed set and the search tree of
+the states it owns and the part of the current layer made of them. A layer is
+searched in two steps: every worker expands its part of the layer and sorts the
+children by owner, then every owner takes in the children sent to it and keeps
+those its closed set accepts as the next layer. The coordinating process only
+routes children between workers and stops at the first layer holding a goal,
+so the plan is as short as the one breadthFirstSearch finds.
+
+A node's id packs its owner and its index in the owner's search tree
+(index * workers + owner); the path is rebuilt by asking the owners for the
+parent and action of each id in turn.
+"""
+
+import multiprocessing
+import os
+import pickle
+import time
+
+from robby.search import ClosedSet, NodeStore, SearchStats
+
+
+def parallelBreadthFirstSearch(problem, verbose=False, workers=None):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by a
+    breadth-first search split across workers processes (default: one per core), or "" if there is none.'''
+    workers = workers or os.cpu_count() or 1
+    stats = SearchStats("pbfs")
+    start = time.perf_counter()
+
+    # Fork where we can so the workers inherit the problem instead of unpickling it
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    connections, processes = [], []
+    for rank in range(workers):
+        here, there = context.Pipe()
+        process = context.Process(target=_worker, args=(problem, rank, workers, there), daemon=True)
+        process.start()
+        connections.append(here)
+        processes.append(process)
+
+    try:
+        path = _search(problem, connections, stats, verbose)
+        for connection in connections:
+            connection.send(("stats",))
+        for hits, pruned, size in [connection.recv() for connection in connections]:
+            stats.duplicates += hits
+            stats.pruned += pruned
+            stats.peakClosed += size
+    finally:
+        for connection in connections:
+            connection.send(("stop",))
+        for process in processes:
+            process.join()
+
+    stats.elapsed = time.perf_counter() - start
+    if verbose:
+        print("--> searched {} paths with {} workers".format(stats.expansions, workers))
+    return path, stats
+
+
+def _search(problem, connections, stats, verbose):
+    '''Drive the workers one layer at a time and return the path to the first goal found.'''
+    workers = len(connections)
+    root = problem.root()
+    if problem.isGoal(root):
+        return ""
+    key = problem.key(root)
+    connections[_owner(key, workers)].send(("accept", [pickle.dumps([(key, root, -1, " ")])]))
+    connections[_owner(key, workers)].recv()
+
+    depth = 0
+    while True:
+        depth += 1
+        for connection in connections:
+            connection.send(("expand",))
+        outgoing = []
+        for connection in connections:
+            expanded, buckets = connection.recv()
+            stats.expansions += expanded
+            outgoing.append(buckets)
+        for owner, connection in enumerate(connections):
+            connection.send(("accept", [buckets[owner] for buckets in outgoing]))
+        replies = [connection.recv() for connection in connections]
+
+        accepted = sum(count for count, goal in replies)
+        stats.generated += accepted
+        stats.peakFrontier = max(stats.peakFrontier, accepted)
+        if verbose:
+            print(f"Searched layer {depth} ({accepted} new states)...")
+        goals = [goal for count, goal in replies if goal is not None]
+        if goals:
+            return _path(connections, min(goals))
+        if not accepted:
+            return ""
+
+
+def _path(connections, node):
+    '''Rebuild the action string leading to the node with the given id by asking its owners.'''
+    workers = len(connections)
+    actions = []
+    while node >= 0:
+        connection = connections[node % workers]
+        connection.send(("parent", node // workers))
+        node, action = connection.recv()
+        if node >= 0:
+            actions.append(action)
+    return bytes(reversed(actions)).decode("ascii")
+
+
+def _owner(key, workers):
+    '''Return the worker that owns the states with the given key.'''
+    # Scramble the key first: its low digits are Robby's position, which neighbouring states share
+    return (key * 0x9E3779B97F4A7C15 >> 32) % workers
+
+
+def _worker(problem, rank, workers, connection):
+    '''Serve the coordinator's requests for the states owned by worker rank until told to stop.
+
+    ("expand",) expands the current layer and replies (expanded, buckets), where buckets[owner]
+    lists the children owned by each worker as (key, node, parent id, action); among
+    children sharing a key only the first with the most battery is sent. Buckets travel
+    pickled, so the coordinator passes them on without unpickling them. ("accept", buckets)
+    adds the children the closed set accepts as the next layer and replies (accepted, goal),
+    where goal is the id of the first goal accepted or None. ("parent", index) replies
+    (parent id, action byte) of a node, and ("stats",) the duplicates, battery-pruned
+    states and size of the worker's closed set.'''
+    closed = ClosedSet()
+    nodes = NodeStore()
+    layer = []
+    while True:
+        message = connection.recv()
+        if message[0] == "expand":
+            buckets = [{} for owner in range(workers)]
+            for index, node in layer:
+                parent = index * workers + rank
+                for action, child in problem.successors(node):
+                    key = problem.key(child)
+                    bucket = buckets[_owner(key, workers)]
+                    if bucket.get(key, (None, (0, -1)))[1][1] < child[1]:
+                        bucket[key] = (key, child, parent, action)
+            connection.send((len(layer), [pickle.dumps(list(bucket.values()), pickle.HIGHEST_PROTOCOL)
+                                          for bucket in buckets]))
+            layer = []
+        elif message[0] == "accept":
+            goal = None
+            for bucket in message[1]:
+                for key, child, parent, action in pickle.loads(bucket):
+                    if closed.add(key, child[1]):
+                        index = nodes.add(parent, action)
+                        layer.append((index, child))
+                        if goal is None and problem.isGoal(child):
+                            goal = index * workers + rank
+            connection.send((len(layer), goal))
+        elif message[0] == "parent":
+            connection.send((nodes.parents[message[1]], nodes.actions[message[1]]))
+        elif message[0] == "stats":
+            connection.send((closed.hits, closed.pruned, len(closed)))
+        else:
+            return
@@ -0,0 +1,321 @@
+"""
+Points of interest and macro-action planning.
+
+Most of a primitive search is spent re-walking the same corridors between cans
+and batteries. PointsOfInterest runs one grid BFS per point of interest
+(Robby's start, every can and every battery) to get the distance from every
+cell to it and the next move towards it. macroSearch then plans over "walk to
+a can or battery and grab it" macro-actions under the battery constraint, and
+expands the chosen legs back into a plain N/E/S/W/G string.
+
+A leg may not step onto a can other than its target, since Robby would have to
+pick that can up first. The precomputed routes ignore that rule, so a leg whose
+route crosses k remaining cans falls back to a bounded BFS around them. Only
+detours shorter than the route plus k are worth taking: otherwise walking the
+route and grabbing the k cans on the way (a chain of other macro-actions) costs
+no more, leaves at least as much battery and picks up more cans.
+"""
+
+from array import array
+from collections import deque
+import heapq
+import math
+import time
+
+from robby.search import ClosedSet, SearchStats, bits
+from robby.trace import PROGRESS_STRIDE, Tracer
+
+# States kept per layer by the first, inexact pass of heldKarpSearch
+HELD_KARP_BEAM_WIDTH = 64
+
+
+class PointsOfInterest:
+    '''Distance and next-hop tables for the start, cans and batteries of a SearchProblem.
+
+    pois lists the cells of interest (start first) and index maps a cell back to its
+    position in pois. matrix[i][j] is the number of moves between pois i and j,
+    ignoring battery and cans; nextHops[i][cell] is the move that takes Robby from
+    cell one step closer to poi i.'''
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.pois = []
+        self.index = {}
+        for cell in [problem.start] + list(bits(problem.cans)) + list(bits(problem.batteries)):
+            if cell not in self.index:
+                self.index[cell] = len(self.pois)
+                self.pois.append(cell)
+
+        # One grid BFS per poi gives a row of the distance matrix and its next hops
+        self.distances = [problem.distancesFrom(cell) for cell in self.pois]
+        self.nextHops = [problem.nextHopsTo(cell) for cell in self.pois]
+        self.matrix = [[distances[cell] for cell in self.pois] for distances in self.distances]
+
+        self._routes = {}  # (source, target) -> (moves, bitboard of cells stepped onto)
+        self._detours = {}  # (source, target, blocked) -> moves or None
+
+    def route(self, source, target):
+        '''Return (moves, cells) for a shortest walk from cell source to poi cell target, where
+        cells is the bitboard of the cells stepped onto, or None if target is unreachable.'''
+        if (source, target) not in self._routes:
+            i = self.index[target]
+            if self.distances[i][source] == math.inf:
+                self._routes[source, target] = None
+            else:
+                moves, cells, cell = [], 0, source
+                nextHops = self.nextHops[i]
+                while cell != target:
+                    moves.append(nextHops[cell])
+                    cell = self.problem.moves[nextHops[cell]][cell]
+                    cells |= 1 << cell
+                self._routes[source, target] = ("".join(moves), cells)
+        return self._routes[source, target]
+
+    def leg(self, source, target, blocked):
+        '''Return the moves of a shortest walk from source to target that never steps onto a cell
+        in the blocked bitboard (the other remaining cans), or None if there is no such walk
+        worth taking (see the module docstring).'''
+        route = self.route(source, target)
+        if route is None:
+            return None
+        moves, cells = route
+        crossed = cells & blocked
+        if not crossed:
+            return moves
+        if (source, target, blocked) not in self._detours:
+            bound = len(moves) + bin(crossed).count("1") - 1
+            self._detours[source, target, blocked] = self._detour(source, target, blocked, bound)
+        return self._detours[source, target, blocked]
+
+    def _detour(self, source, target, blocked, bound):
+        '''BFS from source to target around the blocked cells, keeping to walks of at most bound moves.'''
+        moves = self.problem.moves
+        toTarget = self.distances[self.index[target]]
+        previous = {source: None}
+        queue = deque([(source, 0)])
+        while queue:
+            here, depth = queue.popleft()
+            if here == target:
+                steps = []
+                while previous[here] is not None:
+                    here, direction = previous[here]
+                    steps.append(direction)
+                return "".join(reversed(steps))
+            for direction in "NESW":
+                there = moves[direction][here]
+                if there >= 0 and there not in previous and not blocked >> there & 1 \
+                        and depth + 1 + toTarget[there] <= bound:
+                    previous[there] = (here, direction)
+                    queue.append((there, depth + 1))
+        return None
+
+
+def macroSearch(problem, verbose=False, heuristic="mst"):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by A* over
+    "walk to a can or battery and grab it" macro-actions, or "" if there is none.'''
+    from robby.heuristics import HEURISTICS
+
+    path = ""
+    stats = SearchStats("macro")
+    start = time.perf_counter()
+    tracer = Tracer.forVerbose(verbose)
+    pois = PointsOfInterest(problem)
+    h = HEURISTICS[heuristic](problem)
+    fullBattery = problem.fullBattery
+    root = problem.root()
+
+    # The search tree: parent index and expanded leg (moves plus the final grab) of every node
+    parents = array("q", [-1])
+    legs = [""]
+    closed = ClosedSet()
+    counter = 0
+
+    # Frontier entries are (f, -g, counter, index, node), as in aStarSearch
+    frontier = []
+    if h(root) < math.inf:
+        frontier.append((h(root), 0, counter, 0, root))
+
+    while frontier:
+        f, g, _, index, node = heapq.heappop(frontier)
+        g = -g
+        if not closed.add(problem.key(node), node[1]):
+            continue
+        stats.expansions += 1
+        if tracer is not None and (tracer.sampling or stats.expansions % PROGRESS_STRIDE == 0):
+            tracer.expand(stats, len(frontier), _legsTo, parents, legs, index, pos=node[0])
+
+        if problem.isGoal(node):
+            path = _legsTo(parents, legs, index)
+            break
+
+        pos, battery, cans, batteries = node
+        # A can under Robby must be picked up before going anywhere else
+        targets = [pos] if cans >> pos & 1 else bits(cans | batteries)
+        for target in targets:
+            bit = 1 << target
+            leg = pois.leg(pos, target, cans & ~bit)
+            if leg is None:
+                continue
+            # Every step must leave some battery; grabbing a can costs one more
+            if cans & bit:
+                newBattery = battery - len(leg) - 1
+                if newBattery < 1:
+                    continue
+                child = (target, newBattery, cans & ~bit, batteries)
+            else:
+                if battery - len(leg) < 1 or fullBattery < 1:
+                    continue
+                child = (target, fullBattery, cans, batteries & ~bit)
+            if closed.table.get(problem.key(child), -1) >= child[1]:
+                continue
+            hChild = h(child)
+            if hChild == math.inf:
+                continue
+            cost = g + len(leg) + 1
+            parents.append(index)
+            legs.append(leg + "G")
+            counter += 1
+            heapq.heappush(frontier, (cost + hChild, -cost, counter, len(legs) - 1, child))
+            stats.generated += 1
+        if len(frontier) > stats.peakFrontier:
+            stats.peakFrontier = len(frontier)
+
+    stats.elapsed = time.perf_counter() - start
+    stats.recordClosed(closed)
+    if tracer is not None:
+        tracer.finish(stats)
+    if verbose:
+        print("--> searched {} plans over {} points of interest".format(stats.expansions, len(pois.pois)))
+        print("--> closed set holds {} states ({} duplicates, {} battery-pruned, {:.1f} KiB)".format(
+            len(closed), closed.hits, closed.pruned, closed.memoryFootprint() / 1024))
+
+    return path, stats
+
+
+def _legsTo(parents, legs, index):
+    '''Join the legs that lead from the root of a macroSearch tree to node index.'''
+    legsTaken = []
+    while index > 0:
+        legsTaken.append(legs[index])
+        index = parents[index]
+    return "".join(reversed(legsTaken))
+
+
+def heldKarpSearch(problem, verbose=False, heuristic="mst"):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by Held-Karp
+    style dynamic programming over subsets of the cans and batteries, or "" if there is none.
+
+    Every macro-action removes exactly one can or battery from the world, so states
+    (position, remaining cans, remaining batteries) can be solved one layer at a time in
+    order of how many items have been removed. Each state keeps the Pareto front of its
+    (cost, battery) pairs: an entry is dropped when another costs no more and leaves at
+    least as much battery. Time and memory grow with 2^items * pois rather than with the
+    number of primitive states. A first pass that keeps only the most promising states of
+    each layer finds a plan quickly; the exact pass then drops every entry whose cost plus
+    the heuristic cannot beat it.'''
+    from robby.heuristics import HEURISTICS
+
+    path = ""
+    stats = SearchStats("heldkarp")
+    start = time.perf_counter()
+    pois = PointsOfInterest(problem)
+    h = HEURISTICS[heuristic](problem)
+
+    best = _solveLayers(problem, pois, h, None, stats, HELD_KARP_BEAM_WIDTH)
+    if verbose and best is not None:
+        print(f"Found a plan of length {best[0]} with a beam of {HELD_KARP_BEAM_WIDTH} states per layer...")
+    best = _solveLayers(problem, pois, h, best, stats, None, verbose)
+
+    if best is not None:
+        legsTaken = []
+        while best[3] is not None:
+            legsTaken.append(best[2])
+            best = best[3]
+        path = "".join(reversed(legsTaken))
+
+    stats.elapsed = time.perf_counter() - start
+    if verbose:
+        print("--> expanded {} entries over {} points of interest".format(stats.expansions, len(pois.pois)))
+
+    return path, stats
+
+
+def _solveLayers(problem, pois, h, best, stats, beamWidth=None, verbose=False):
+    '''Run the layered dynamic program of heldKarpSearch and return the final front entry of the best
+    plan found, or best (the entry of a plan found earlier, or None) if nothing beats it. With a
+    beamWidth, only that many states (those with the lowest cost plus heuristic) survive each layer.'''
+    fullBattery = problem.fullBattery
+
+    # Front entries are (cost, battery, leg, parent entry); the leg includes the final grab
+    root = problem.root()
+    layer = {}
+    if h(root) < math.inf:
+        layer[root[0], root[2], root[3]] = [(0, root[1], "", None)]
+    depth = 0
+    while layer:
+        nextLayer = {}
+        for (pos, cans, batteries), front in layer.items():
+            if not cans:
+                for entry in front:
+                    if best is None or entry[0] < best[0]:
+                        best = entry
+                continue
+            # A can under Robby must be picked up before going anywhere else
+            targets = [pos] if cans >> pos & 1 else list(bits(cans | batteries))
+            distances = pois.matrix[pois.index[pos]]
+            for entry in front:
+                cost, battery = entry[0], entry[1]
+                if best is not None and cost >= best[0]:
+                    continue
+                stats.expansions += 1
+                for target in targets:
+                    bit = 1 << target
+                    # A leg is never shorter than the distance between its ends, so targets too far away
+                    # for the battery or the best plan are dropped before working out the leg
+                    distance = distances[pois.index[target]]
+                    if distance > battery - (2 if cans & bit else 1) or \
+                            best is not None and cost + distance + 1 >= best[0]:
+                        continue
+                    leg = pois.leg(pos, target, cans & ~bit)
+                    if leg is None:
+                        continue
+                    if cans & bit:
+                        node = (target, battery - len(leg) - 1, cans & ~bit, batteries)
+                        if node[1] < 1:
+                            continue
+                    else:
+                        if battery - len(leg) < 1 or fullBattery < 1:
+                            continue
+                        node = (target, fullBattery, cans, batteries & ~bit)
+                    childCost = cost + len(leg) + 1
+                    hChild = h(node)
+                    if hChild == math.inf or best is not None and childCost + hChild >= best[0]:
+                        continue
+                    child = (childCost, node[1], leg + "G", entry)
+                    if _addToFront(nextLayer.setdefault((target, node[2], node[3]), []), child):
+                        stats.generated += 1
+                    else:
+                        stats.pruned += 1
+
+        if beamWidth is not None and len(nextLayer) > beamWidth:
+            def promise(item):
+                (pos, cans, batteries), front = item
+                return min(entry[0] + h((pos, entry[1], cans, batteries)) for entry in front)
+            nextLayer = dict(sorted(nextLayer.items(), key=promise)[:beamWidth])
+        layer = nextLayer
+        stats.peakFrontier = max(stats.peakFrontier, sum(len(front) for front in layer.values()))
+        depth += 1
+        if verbose:
+            print(f"Solved layer {depth} ({len(layer)} states)...")
+    return best
+
+
+def _addToFront(front, entry):
+    '''Add a (cost, battery, ...) entry to a Pareto front unless one already there dominates it.'''
+    cost, battery = entry[0], entry[1]
+    for other in front:
+        if other[0] <= cost and other[1] >= battery:
+            return False
+    front[:] = [other for other in front if not (cost <= other[0] and battery >= other[1])]
+    front.append(entry)
+    return True
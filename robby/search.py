@@ -0,0 +1,505 @@
+"""
+Search engines for Robby's world.
+
+A SearchProblem captures a world once (size, walls, start, battery and action
+order) and generates successors incrementally: every node carries Robby's
+position, battery and the cans and batteries still in the world, so a child is
+built from its parent without replaying the path from the start. The rules are
+the same ones isvalid() and issolved() in robby_search.py check by replay.
+
+Grid contents are bitboards: bit r * numCols + c of an int stands for the cell
+at row r, column c. Walls never change and are computed once per problem; a
+node only holds the can and battery bitboards, so grabbing, the goal test and
+hashing are single integer operations.
+"""
+
+from array import array
+from collections import deque
+import heapq
+import math
+import sys
+import time
+
+from robby.core import moveTable
+from robby.trace import PROGRESS_STRIDE, Tracer
+
+
+# The move that undoes each move
+OPPOSITE = {"N": "S", "E": "W", "S": "N", "W": "E"}
+
+
+def bitboard(contents, item):
+    '''Return the bitboard of the cells in a contents string that hold item.'''
+    board = 0
+    for cell, value in enumerate(contents):
+        if value == item:
+            board |= 1 << cell
+    return board
+
+
+def bits(board):
+    '''Yield the cell index of every set bit of a bitboard, lowest first.'''
+    while board:
+        low = board & -board
+        yield low.bit_length() - 1
+        board ^= low
+
+
+class SearchProblem:
+    '''Everything a search needs to know about a world, captured once up front.
+
+    Nodes are tuples (pos, battery, cans, batteries), where pos is Robby's cell
+    index and cans and batteries are bitboards of the items still in the world.'''
+
+    def __init__(self, world, contents=None, actions="GNESW", battery=None):
+        for action in actions:
+            if action not in "GNESW":
+                raise ValueError(f"bad action: {action}")
+        self.numRows, self.numCols = world.numRows, world.numCols
+        self.numCells = self.numRows * self.numCols
+        self.startRow, self.startCol = world.getCurrentPosition()
+        self.start = self.startRow * self.numCols + self.startCol
+        contents = world._gridContents() if contents is None else contents
+        self.fullBattery = world.fullBattery if battery is None else battery
+        self.actions = actions
+
+        # Precompute the world's bitboards
+        self.walls = bitboard(contents, "W")
+        self.cans = bitboard(contents, "C")
+        self.batteries = bitboard(contents, "B")
+
+        # Pair each action with its row of the transition table (None for a grab), in action order
+        self.moves = moveTable(self.numRows, self.numCols, contents)
+        self.steps = [(action, None if action == "G" else self.moves[action]) for action in actions]
+        self._fields = {}
+
+    def _field(self, cell):
+        '''Run (once) a grid BFS out of cell and return its (distances, nextHops) lists.'''
+        if cell not in self._fields:
+            distances = [math.inf] * self.numCells
+            nextHops = [""] * self.numCells
+            distances[cell] = 0
+            queue = deque([cell])
+            while queue:
+                here = queue.popleft()
+                for direction in "NESW":
+                    there = self.moves[direction][here]
+                    if there >= 0 and distances[there] == math.inf:
+                        distances[there] = distances[here] + 1
+                        # Moves are symmetric, so stepping back the way we came leads towards cell
+                        nextHops[there] = OPPOSITE[direction]
+                        queue.append(there)
+            self._fields[cell] = (distances, nextHops)
+        return self._fields[cell]
+
+    def distancesFrom(self, cell):
+        '''Return the number of moves from cell to every cell (math.inf if unreachable), ignoring battery.'''
+        return self._field(cell)[0]
+
+    def nextHopsTo(self, cell):
+        '''Return, for every cell, the move that takes Robby one step closer to cell ("" if none).'''
+        return self._field(cell)[1]
+
+    def root(self):
+        return (self.start, self.fullBattery, self.cans, self.batteries)
+
+    def isGoal(self, node):
+        return node[2] == 0
+
+    def key(self, node):
+        '''Pack the position and remaining items of node into one int. Battery is left out so
+        that states differing only in battery share a key and can be compared by ClosedSet.'''
+        pos, battery, cans, batteries = node
+        # Items only ever disappear, so cans | batteries identifies both boards
+        return (cans | batteries) * self.numCells + pos
+
+    def replay(self, path):
+        '''Return the node reached by taking the actions of path from the root, or None if one of
+        them is not valid at that point.'''
+        node = self.root()
+        for action in path:
+            for candidate, child in self.successors(node):
+                if candidate == action:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def successors(self, node):
+        '''Yield (action, child) for every valid action from node, in action order.'''
+        pos, battery, cans, batteries = node
+        bit = 1 << pos
+        # A can under Robby must be picked up before any other action
+        canMove = battery > 1 and not cans & bit
+        for action, table in self.steps:
+            if table is None:
+                if cans & bit:
+                    if battery > 1:
+                        yield action, (pos, battery - 1, cans & ~bit, batteries)
+                elif batteries & bit and self.fullBattery > 0:
+                    yield action, (pos, self.fullBattery, cans, batteries & ~bit)
+            elif canMove:
+                cell = table[pos]
+                if cell >= 0:
+                    yield action, (cell, battery - 1, cans, batteries)
+
+
+class ClosedSet:
+    '''Dominance-aware transposition table of the states a search has already generated.
+
+    Maps SearchProblem.key() (position and remaining items) to the most battery
+    seen with that key. A state with no more battery than one already seen can
+    never do better, so it is rejected: as a duplicate if the battery is equal,
+    or as battery-pruned if it is lower. Loops are rejected the same way, since
+    walking in a circle only costs battery.'''
+
+    def __init__(self):
+        self.table = {}
+        self.hits = 0  # number of duplicate states rejected
+        self.pruned = 0  # number of states rejected because a seen state had more battery
+
+    def __len__(self):
+        return len(self.table)
+
+    def add(self, key, battery):
+        '''Record (key, battery) and return True, or return False if it is dominated by a state already seen.'''
+        best = self.table.get(key, -1)
+        if best >= battery:
+            if best == battery:
+                self.hits += 1
+            else:
+                self.pruned += 1
+            return False
+        self.table[key] = battery
+        return True
+
+    def memoryFootprint(self):
+        '''Return the approximate number of bytes held by the table, its keys and values.'''
+        return sys.getsizeof(self.table) + sum(sys.getsizeof(key) + sys.getsizeof(battery)
+                                               for key, battery in self.table.items())
+
+
+class NodeStore:
+    '''Search tree kept in two parallel arrays: the action byte that led to each node
+    and the index of its parent. Paths are only rebuilt as strings when asked for.'''
+
+    def __init__(self):
+        self.actions = array("B")
+        self.parents = array("q")
+
+    def __len__(self):
+        return len(self.parents)
+
+    def add(self, parent, action):
+        '''Store a node reached from parent (-1 for the root) by action and return its index.'''
+        self.actions.append(ord(action))
+        self.parents.append(parent)
+        return len(self.parents) - 1
+
+    def path(self, index):
+        '''Rebuild the action string that leads from the root to node index.'''
+        actions = []
+        while index > 0:
+            actions.append(self.actions[index])
+            index = self.parents[index]
+        return bytes(reversed(actions)).decode("ascii")
+
+    def memoryFootprint(self):
+        '''Return the number of bytes held by the two arrays.'''
+        return sys.getsizeof(self.actions) + sys.getsizeof(self.parents)
+
+
+class SearchStats:
+    '''Counters and timings collected by one run of a search engine.
+
+    Every engine fills in the counters it has a use for. The time split between successor
+    generation, hashing and goal tests is only measured when the engine runs on a TimedProblem
+    (see robby.engines.solve), since timing every call slows the search down.'''
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.expansions = 0  # nodes taken off the frontier
+        self.generated = 0  # children added to the frontier
+        self.duplicates = 0  # states rejected because the same state had already been seen
+        self.pruned = 0  # states rejected because a seen state with the same key had more battery
+        self.peakFrontier = 0  # most states waiting on the frontier (or on the path, for depth-first engines)
+        self.peakClosed = 0  # most states held in the closed set or transposition table
+        self.elapsed = 0.0  # wall-clock seconds
+        self.successorTime = 0.0  # seconds spent generating successors
+        self.hashTime = 0.0  # seconds spent computing state keys
+        self.goalTime = 0.0  # seconds spent in goal tests
+        self.firstSolution = None  # seconds until the first plan was found, for engines that keep improving it
+        self.lowerBound = None  # proven lower bound on the plan length, for engines that stop early
+        self.cached = False  # True if the plan came out of a SolutionCache instead of a search
+
+    def __repr__(self):
+        bound = "" if self.lowerBound is None else ", lowerBound={}".format(self.lowerBound)
+        return "SearchStats({}, expansions={}, generated={}, elapsed={:.4f}{})".format(
+            self.engine, self.expansions, self.generated, self.elapsed, bound)
+
+    def asDict(self):
+        '''Return the stats as a dictionary, ready to be written out as JSON.'''
+        return dict(vars(self))
+
+    def recordClosed(self, closed):
+        '''Take the duplicate and pruning counts and size of a ClosedSet at the end of a search.'''
+        self.duplicates += closed.hits
+        self.pruned += closed.pruned
+        self.peakClosed = max(self.peakClosed, len(closed))
+
+    def report(self):
+        '''Describe the stats over a few lines, as printed by verbose searches.'''
+        lines = ["--> {} expansions, {} generated, {} duplicates, {} battery-pruned".format(
+                     self.expansions, self.generated, self.duplicates, self.pruned),
+                 "--> peak frontier {} states, peak closed set {} states, {:.4f}s".format(
+                     self.peakFrontier, self.peakClosed, self.elapsed)]
+        if self.successorTime or self.hashTime or self.goalTime:
+            lines.append("--> {:.4f}s generating successors, {:.4f}s hashing, {:.4f}s in goal tests".format(
+                self.successorTime, self.hashTime, self.goalTime))
+        return "\n".join(lines)
+
+    def compare(self, baseline):
+        '''Describe these stats relative to those of a baseline run (usually BFS).'''
+        return "{}: {} expansions ({:.3g}x {}), {:.4f}s ({:.3g}x {})".format(
+            self.engine, self.expansions, self.expansions / max(baseline.expansions, 1), baseline.engine,
+            self.elapsed, self.elapsed / max(baseline.elapsed, 1e-9), baseline.engine)
+
+
+class TimedProblem:
+    '''A SearchProblem that adds up the time spent in its successors(), key() and isGoal().
+    Everything else is passed through to the problem it wraps. Work done in other
+    processes, such as by the workers of pbfs, is not counted.'''
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.successorTime = 0.0
+        self.hashTime = 0.0
+        self.goalTime = 0.0
+
+    def __getattr__(self, name):
+        if name == "problem":
+            raise AttributeError(name)  # not set yet, as while unpickling
+        return getattr(self.problem, name)
+
+    def successors(self, node):
+        start = time.perf_counter()
+        children = list(self.problem.successors(node))
+        self.successorTime += time.perf_counter() - start
+        return iter(children)
+
+    def key(self, node):
+        start = time.perf_counter()
+        key = self.problem.key(node)
+        self.hashTime += time.perf_counter() - start
+        return key
+
+    def isGoal(self, node):
+        start = time.perf_counter()
+        goal = self.problem.isGoal(node)
+        self.goalTime += time.perf_counter() - start
+        return goal
+
+
+def breadthFirstSearch(problem, verbose=False):
+    '''Return (path, stats), where path is the first shortest path (in action order) that picks
+    up every can, or "" if there is none.'''
+    path = ""
+    stats = SearchStats("bfs")
+    start = time.perf_counter()
+    tracer = Tracer.forVerbose(verbose)
+    root = problem.root()
+    nodes = NodeStore()
+    queue = deque([(nodes.add(-1, " "), root)])
+    closed = ClosedSet()
+    closed.add(problem.key(root), root[1])
+
+    while queue:
+        index, node = queue.popleft()
+        stats.expansions += 1
+        if tracer is not None and (tracer.sampling or stats.expansions % PROGRESS_STRIDE == 0):
+            tracer.expand(stats, len(queue), nodes.path, index, pos=node[0])
+
+        # If the node contains the goal state then return the solution
+        if problem.isGoal(node):
+            path = nodes.path(index)
+            break
+
+        for action, child in problem.successors(node):
+            if closed.add(problem.key(child), child[1]):
+                queue.append((nodes.add(index, action), child))
+                stats.generated += 1
+        if len(queue) > stats.peakFrontier:
+            stats.peakFrontier = len(queue)
+
+    stats.elapsed = time.perf_counter() - start
+    stats.recordClosed(closed)
+    if tracer is not None:
+        tracer.finish(stats)
+    if verbose:
+        print("--> searched {} paths".format(stats.expansions))
+        print("--> closed set holds {} states ({} duplicates, {} battery-pruned, {:.1f} KiB)".format(
+            len(closed), closed.hits, closed.pruned, closed.memoryFootprint() / 1024))
+        print("--> search tree holds {} nodes ({:.1f} KiB)".format(len(nodes), nodes.memoryFootprint() / 1024))
+
+    return path, stats
+
+
+def aStarSearch(problem, verbose=False, heuristic="mst"):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by A* with
+    one of the admissible heuristics in robby.heuristics, or "" if there is none.'''
+    from robby.heuristics import HEURISTICS
+
+    path = ""
+    stats = SearchStats("astar")
+    start = time.perf_counter()
+    tracer = Tracer.forVerbose(verbose)
+    h = HEURISTICS[heuristic](problem)
+    root = problem.root()
+    nodes = NodeStore()
+    closed = ClosedSet()
+    counter = 0  # breaks ties between equal f and g in first-in, first-out order
+
+    # Frontier entries are (f, -g, counter, index, node): lowest f first, deepest first among equal f
+    frontier = []
+    if h(root) < math.inf:
+        frontier.append((h(root), 0, counter, nodes.add(-1, " "), root))
+
+    while frontier:
+        f, g, _, index, node = heapq.heappop(frontier)
+        g = -g
+
+        # The heuristic is consistent and depends only on the key, so states sharing a key are
+        # expanded in order of increasing g. One with no more battery than its predecessor is dominated.
+        if not closed.add(problem.key(node), node[1]):
+            continue
+        stats.expansions += 1
+        if tracer is not None and (tracer.sampling or stats.expansions % PROGRESS_STRIDE == 0):
+            tracer.expand(stats, len(frontier), nodes.path, index, pos=node[0])
+
+        if problem.isGoal(node):
+            path = nodes.path(index)
+            break
+
+        for action, child in problem.successors(node):
+            if closed.table.get(problem.key(child), -1) >= child[1]:
+                continue
+            hChild = h(child)
+            if hChild == math.inf:
+                continue
+            counter += 1
+            heapq.heappush(frontier, (g + 1 + hChild, -(g + 1), counter, nodes.add(index, action), child))
+            stats.generated += 1
+        if len(frontier) > stats.peakFrontier:
+            stats.peakFrontier = len(frontier)
+
+    stats.elapsed = time.perf_counter() - start
+    stats.recordClosed(closed)
+    if tracer is not None:
+        tracer.finish(stats)
+    if verbose:
+        print("--> searched {} paths".format(stats.expansions))
+        print("--> closed set holds {} states ({} duplicates, {} battery-pruned, {:.1f} KiB)".format(
+            len(closed), closed.hits, closed.pruned, closed.memoryFootprint() / 1024))
+
+    return path, stats
+
+
+def iterativeDeepeningSearch(problem, verbose=False, tableSize=0):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by
+    iterative-deepening depth-first search, or "" if there is none. See idaStarSearch.'''
+    from robby.heuristics import zeroHeuristic
+
+    return _iterativeDeepening(problem, zeroHeuristic(problem), SearchStats("iddfs"), verbose, tableSize)
+
+
+def idaStarSearch(problem, verbose=False, heuristic="mst", tableSize=0):
+    '''Return (path, stats), where path is a shortest path that picks up every can, found by IDA*
+    with one of the admissible heuristics in robby.heuristics, or "" if there is none.
+
+    Memory is O(depth): only the current path and the states on it are kept. With a
+    tableSize, a transposition table of at most that many states remembers how much
+    battery and depth budget each state was last searched with, trading memory for
+    fewer re-expansions; the oldest entries are evicted first.'''
+    from robby.heuristics import HEURISTICS
+
+    return _iterativeDeepening(problem, HEURISTICS[heuristic](problem), SearchStats("idastar"), verbose, tableSize)
+
+
+def _iterativeDeepening(problem, h, stats, verbose, tableSize):
+    start = time.perf_counter()
+    tracer = Tracer.forVerbose(verbose)
+    path = _deepen(problem, h, stats, tracer, tableSize)
+    stats.elapsed = time.perf_counter() - start
+    if tracer is not None:
+        tracer.finish(stats)
+    if verbose:
+        print("--> searched {} paths".format(stats.expansions))
+    return path or "", stats
+
+
+def _deepen(problem, h, stats, tracer, tableSize):
+    '''Run depth-first searches with a growing bound on g + h and return the first path found.'''
+    root = problem.root()
+    if problem.isGoal(root):
+        return ""
+    table = {}  # key -> (battery, budget) of the last search below that state
+    bound = h(root)
+    while bound < math.inf:
+        if tracer is not None:
+            tracer.note(f"Searching paths with g + h <= {bound}...")
+        nextBound = math.inf
+        actions = []
+        onPath = {problem.key(root)}
+
+        # Depth-first search with an explicit stack of (node, g, key, children) so deep plans
+        # cannot overflow Python's recursion limit
+        stack = [(root, 0, problem.key(root), problem.successors(root))]
+        stats.expansions += 1
+        if tracer is not None and (tracer.sampling or stats.expansions % PROGRESS_STRIDE == 0):
+            tracer.expand(stats, len(stack), "".join, actions, pos=root[0])
+        while stack:
+            node, g, key, children = stack[-1]
+            for action, child in children:
+                childKey = problem.key(child)
+                # Returning to a state on the current path only loses battery
+                if childKey in onPath:
+                    stats.pruned += 1
+                    continue
+                f = g + 1 + h(child)
+                if f > bound:
+                    nextBound = min(nextBound, f)
+                    continue
+                if tableSize:
+                    budget = bound - g - 1
+                    seen = table.get(childKey)
+                    if seen is not None and seen[0] >= child[1] and seen[1] >= budget:
+                        if seen[0] == child[1]:
+                            stats.duplicates += 1
+                        else:
+                            stats.pruned += 1
+                        continue
+                    table.pop(childKey, None)
+                    table[childKey] = (child[1], budget)
+                    if len(table) > tableSize:
+                        del table[next(iter(table))]
+                    stats.peakClosed = max(stats.peakClosed, len(table))
+                stats.generated += 1
+                if problem.isGoal(child):
+                    actions.append(action)
+                    return "".join(actions)
+                actions.append(action)
+                onPath.add(childKey)
+                stack.append((child, g + 1, childKey, problem.successors(child)))
+                stats.peakFrontier = max(stats.peakFrontier, len(stack))
+                stats.expansions += 1
+                if tracer is not None and (tracer.sampling or stats.expansions % PROGRESS_STRIDE == 0):
+                    tracer.expand(stats, len(stack), "".join, actions, pos=child[0])
+                break
+            else:
+                stack.pop()
+                onPath.discard(key)
+                if actions:
+                    actions.pop()
+        bound = nextBound
+    return None
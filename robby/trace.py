@@ -0,0 +1,122 @@
+"""
+Sampled tracing of searches.
+
+Printing every expansion makes a large search spend its time on terminal I/O.
+A Tracer instead keeps a sample of expansions in memory (every Nth, the first
+K and the last K, each in a bounded buffer) and writes them to a file in one go
+when the search finishes. The console only gets a progress line, rewritten in
+place at most once per interval, showing states per second, frontier size and
+depth. A progress function gets the same figures at the same times, for
+callers that show them somewhere else, such as the game window, which can
+also ask for the number of expansions at each of Robby's positions.
+
+Engines take verbose= as either a bool or a Tracer; Tracer.forVerbose() turns
+either into a Tracer (or None), and a Tracer is truthy when it reports to the
+console, so the engines' closing summaries follow it. Unless the Tracer is
+sampling, engines only call expand() once every PROGRESS_STRIDE expansions,
+so a progress line alone costs the search next to nothing.
+"""
+
+from collections import deque
+import sys
+import time
+
+# Expansions between checks of the clock for the progress line
+PROGRESS_STRIDE = 1024
+
+
+class Tracer:
+    '''Samples the expansions of one search and reports its progress.
+
+    With every, one expansion in every that many is recorded, keeping at most capacity of
+    them; first and last keep the first and last that many expansions. Recorded
+    expansions are written to file by finish(), one tab-separated line each. With console,
+    a progress line is written to stream at most once every interval seconds; progress, if
+    given, is called as often with (expansions, rate, frontier, depth). positions, if given,
+    is a list of one counter per cell, counting the expansions with Robby in that cell.
+    Keeping the last expansions means rebuilding the path of every one, which slows a
+    search down.'''
+
+    def __init__(self, file=None, every=0, first=0, last=0, capacity=100000, console=True, interval=1.0,
+                 stream=sys.stderr, progress=None, positions=None):
+        self.file = file
+        self.every = every
+        self.first = first
+        self.console = console
+        self.interval = interval
+        self.stream = stream
+        self.progress = progress
+        self.positions = positions
+        self.sampling = bool(every or first or last) or positions is not None  # needs every expansion
+        self.head = []
+        self.samples = deque(maxlen=capacity)
+        self.tail = deque(maxlen=last) if last else None
+        self.start = time.perf_counter()
+        self.lastReport = self.start
+        self.lastExpansions = 0
+        self.lineOpen = False  # a progress line has been written and not yet ended
+
+    def __bool__(self):
+        return self.console
+
+    @staticmethod
+    def forVerbose(verbose):
+        '''Return verbose if it is a Tracer, a console-only Tracer if it is true, or None.'''
+        if isinstance(verbose, Tracer):
+            return verbose
+        return Tracer() if verbose else None
+
+    def expand(self, stats, frontier, describe, *args, pos=None):
+        '''Note an expansion with Robby in cell pos. describe(*args) gives the path to the expanded node;
+        it is only called when the expansion is recorded or shown on the progress line.'''
+        if self.positions is not None and pos is not None:
+            self.positions[pos] += 1
+        n = stats.expansions
+        recorded = n <= self.first or self.every and n % self.every == 0 or self.tail is not None
+        report = (self.console or self.progress is not None) and n % PROGRESS_STRIDE == 0
+        if not recorded and not report:
+            return
+        now = time.perf_counter()
+        path = describe(*args)
+        if recorded:
+            record = (n, now - self.start, frontier, len(path), path)
+            if n <= self.first:
+                self.head.append(record)
+            elif self.every and n % self.every == 0:
+                self.samples.append(record)
+            if self.tail is not None:
+                self.tail.append(record)
+        if report and now - self.lastReport >= self.interval:
+            rate = (n - self.lastExpansions) / (now - self.lastReport)
+            if self.console:
+                self.stream.write(f"\r{n} states ({rate:.0f}/s), frontier {frontier}, depth {len(path)}   ")
+                self.stream.flush()
+                self.lineOpen = True
+            if self.progress is not None:
+                self.progress(n, rate, frontier, len(path))
+            self.lastReport, self.lastExpansions = now, n
+
+    def note(self, message):
+        '''Write a line about a stage of the search, such as a new deepening bound, to the console,
+        below the progress line.'''
+        if self.console:
+            self.stream.write(("\n" if self.lineOpen else "") + message + "\n")
+            self.stream.flush()
+            self.lineOpen = False
+
+    def finish(self, stats):
+        '''End the progress line and write the recorded expansions to the trace file.'''
+        if self.lineOpen:
+            self.stream.write("\n")
+            self.stream.flush()
+            self.lineOpen = False
+        if self.file is None:
+            return
+        records = {record[0]: record for record in self.head}
+        records.update((record[0], record) for record in self.samples)
+        if self.tail is not None:
+            records.update((record[0], record) for record in self.tail)
+        lines = ["expansion\tseconds\tfrontier\tdepth\tpath\n"]
+        lines.extend("{}\t{:.6f}\t{}\t{}\t{}\n".format(*records[n]) for n in sorted(records))
+        with open(self.file, "w") as f:
+            f.write("".join(lines))
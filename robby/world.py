@@ -0,0 +1,335 @@
+"""
+Robby the Robot simulator
+
+Written by Jim Marshall
+Sarah Lawrence College, Spring 2015
+http://science.slc.edu/~jmarshall
+
+Based on Chapter 9 of the book "Complexity: A Guided Tour"
+by Melanie Mitchell, Oxford University Press, 2009.
+
+Updated by Jake Roman and Matthew Eicholtz
+Florida Southern College, Fall 2023
+"""
+
+from robby.graphics import *
+from robby.core import POSSIBLE_ACTIONS, WorldModel
+import math
+import time
+import os
+
+ROOT = "robby" + os.sep
+
+# Most times a second the window is redrawn while Robby moves
+FRAME_RATE = 60
+
+# Shades of the search heatmap, from pale yellow (fewest expansions) to red (most)
+HEAT_LEVELS = 8
+HEAT_COLORS = [None] + [color_rgb(255, round(230 - 200 * level / HEAT_LEVELS), round(150 - 150 * level / HEAT_LEVELS))
+                        for level in range(1, HEAT_LEVELS + 1)]
+
+# Where the "ow" icon of a crash is drawn, in cells from the crashing cell
+OW_OFFSETS = {"ow_n": (0, -1), "ow_s": (0, 1), "ow_w": (-1, 0), "ow_e": (1, 0)}
+
+class World(GraphWin, WorldModel):
+    '''Tk view of a WorldModel. All rules live in the model; this class only draws them.'''
+    def __init__(self, rows, cols):
+        # Create the grid
+        iconSize = 40 # pixels
+        spacing = 3 # pixels
+        windowWidth = (iconSize + 2 * spacing) * (cols + 2)
+        windowHeight = (iconSize + 2 * spacing) * (rows + 2)
+        GraphWin.__init__(self, "Robby the Robot", windowWidth, windowHeight, frameRate=FRAME_RATE)
+        WorldModel.__init__(self, rows, cols)
+        self.setBackground("white")
+        self.graphicsEnabled = False
+        self.blank = Rectangle(Point(-1, iconSize), Point(windowWidth, windowHeight - iconSize))
+        self.blank.setFill("aliceblue")
+        self.blank.setOutline("black")
+        self.cellw = iconSize + 2 * spacing
+        self.cellh = iconSize + 2 * spacing
+        x1, y1 = self.cellw, self.cellh
+        x2, y2 = self.cellw * (cols + 1), self.cellh * (rows + 1)
+        x, y = x1, y1
+        for r in range(rows + 1):
+            Line(Point(x1, y), Point(x2, y)).draw(self)
+            y += self.cellh
+        for r in range(cols + 1):
+            Line(Point(x, y1), Point(x, y2)).draw(self)
+            x += self.cellw
+
+        # Create the cells
+        self.grid = [[GridCell(self, r, c) for c in range(cols)] for r in range(rows)]
+        self.heat = {}  # the heatmap's shaded cells: cell index -> (level, Rectangle)
+
+        # Add text objects
+        self.centerText = Text(Point(windowWidth / 2, windowHeight / 2), "")
+        self.centerText._reconfig("anchor", "c")
+        self.centerText.setStyle("italic")
+        self.centerText.setSize(36)
+        self.topLeftText = Text(Point(iconSize + 2 * spacing, iconSize / 2 + spacing), "")
+        self.topLeftText._reconfig("anchor", "w")
+        self.topLeftText.setSize(12)
+        self.topLeftText.draw(self)
+        self.topRightText = Text(Point(windowWidth - iconSize - 2 * spacing, iconSize / 2 + spacing), "")
+        self.topRightText._reconfig("anchor", "e")
+        self.topRightText.setSize(12)
+        self.topRightText.draw(self)
+        self.bottomLeftText = Text(Point(iconSize + 2 * spacing, windowHeight - iconSize / 2 - spacing), "")
+        self.bottomLeftText._reconfig("anchor", "w")
+        self.bottomLeftText.setSize(12)
+        self.bottomLeftText.draw(self)
+
+        self.updateScore()
+        self.updateCost()
+        self.updateBatteryLife()
+
+    def graphicsOff(self, message=""):
+        if self.graphicsEnabled:
+            self.blank.draw(self)
+            self.centerText.setText(message)
+            self.centerText.draw(self)
+            # self.topLeftText.undraw()
+            # self.topRightText.undraw()
+            # self.bottomLeftText.undraw()
+            self.graphicsEnabled = False
+
+    def graphicsOn(self):
+        if not self.graphicsEnabled:
+            self.blank.undraw()
+            self.centerText.undraw()
+            # self.topLeftText.draw(self)
+            # self.topRightText.draw(self)
+            # self.bottomLeftText.draw(self)
+            self.graphicsEnabled = True
+            self._updateGrid()
+
+    def showHeatmap(self, counts):
+        '''Shade every cell by counts[cell], the expansions of search states with Robby in it, on a log
+        scale up to the largest count. Only cells whose shade changed are redrawn.'''
+        scale = HEAT_LEVELS / math.log1p(max(counts, default=0) or 1)
+        with self.batch():
+            for cell, count in enumerate(counts):
+                level = min(HEAT_LEVELS, math.ceil(math.log1p(count) * scale))
+                shaded = self.heat.get(cell)
+                if level == (shaded[0] if shaded else 0):
+                    continue
+                if level == 0:
+                    shaded[1].undraw()
+                    del self.heat[cell]
+                elif shaded is not None:
+                    shaded[1].setFill(HEAT_COLORS[level])
+                    self.heat[cell] = (level, shaded[1])
+                else:
+                    r, c = divmod(cell, self.numCols)
+                    square = Rectangle(Point((c + 1) * self.cellw, (r + 1) * self.cellh),
+                                       Point((c + 2) * self.cellw, (r + 2) * self.cellh))
+                    square.setFill(HEAT_COLORS[level])
+                    square.setOutline("")
+                    square.draw(self)
+                    self.tag_lower(square.id)  # under the icons and grid lines
+                    self.heat[cell] = (level, square)
+
+    def hideHeatmap(self):
+        '''Remove the heatmap's shading.'''
+        with self.batch():
+            for level, square in self.heat.values():
+                square.undraw()
+        self.heat = {}
+
+    def _updateGrid(self):
+        with self.batch():
+            for r in range(self.numRows):
+                for c in range(self.numCols):
+                    self.grid[r][c].updateGraphics()
+
+    # Model hooks: keep the canvas in step with the world contents
+    def _cellChanged(self, row, col):
+        self.grid[row][col].updateGraphics()
+
+    def _robbyLeaving(self, row, col):
+        self.grid[row][col].undrawRobby()
+
+    def _crashed(self, action):
+        self.grid[self.robbyRow][self.robbyCol].crashIntoWall(action)
+
+    def _statsChanged(self):
+        if self.graphicsEnabled:
+            self.updateScore()
+            self.updateCost()
+            self.updateBatteryLife()
+
+    def performAction(self, action):
+        '''Perform an action, redrawing the window once it is complete.'''
+        with self.batch():
+            return WorldModel.performAction(self, action)
+
+    def goto(self, row, col):
+        '''Move Robby to (row, col), redrawing the window once.'''
+        with self.batch():
+            WorldModel.goto(self, row, col)
+
+    def load(self, contents):
+        '''Load environment setup from a string of contents, redrawing the window once.'''
+        with self.batch():
+            return WorldModel.load(self, contents)
+
+    def reset(self):
+        '''Reset the world contents, score, cost, and battery life.'''
+        with self.batch():
+            WorldModel.reset(self)
+            self.updateScore()
+            self.updateCost()
+            self.updateBatteryLife()
+            self.graphicsOn()
+
+    def setFullBattery(self, battery):
+        '''Update the power in a full battery.'''
+        WorldModel.setFullBattery(self, battery)
+        self.updateBatteryLife()
+
+    def updateScore(self):
+        '''Update the text object that tracks score.'''
+        self.topLeftText.setText(f"SCORE = {self.score}")
+
+    def updateCost(self):
+        '''Update the text object that tracks cost.'''
+        self.topRightText.setText(f"COST = {self.cost}")
+
+    def updateBatteryLife(self):
+        '''Update the text object that tracks battery life.'''
+        self.bottomLeftText.setText(f"BATTERY = {self.batteryLife}/{self.fullBattery}")
+
+        if self.batteryLife <= 0:
+            # self.centerText.setText("Robby Died!")
+            self.graphicsOff("Robby Died!")
+
+class GridCell:
+    def __init__(self, world, row, col):
+        # Setup cell properties
+        self.world = world
+        self.row = row
+        self.col = col
+        self.icon = None
+        self.owIcon = None
+        
+        # Compute center of cell
+        self.x = (col + 1) * world.cellw + world.cellw / 2
+        self.y = (row + 1) * world.cellh + world.cellh / 2
+
+        # Icons are made the first time they are drawn; their bitmaps are shared by all cells
+        self.icons = {}
+
+    def getIcon(self, name):
+        '''Return this cell's Image of the named icon. The "ow" icons sit in the neighbouring cell.'''
+        icon = self.icons.get(name)
+        if icon is None:
+            dx, dy = OW_OFFSETS.get(name, (0, 0))
+            icon = Image(Point(self.x + dx * self.world.cellw, self.y + dy * self.world.cellh), ROOT + name + ".gif")
+            self.icons[name] = icon
+        return icon
+
+    @property
+    def contents(self):
+        return self.world.getContents(self.row, self.col)
+
+    def robbyIsHere(self):
+        return self.row == self.world.robbyRow and self.col == self.world.robbyCol
+
+    def setContents(self, newContents):
+        self.world.setContents(self.row, self.col, newContents)
+
+    def clearOwIcon(self):
+        if self.owIcon is not None:
+            self.owIcon.undraw()
+            self.owIcon = None
+
+    def updateGraphics(self):
+        '''Update the graphics in the current GridCell object.'''
+        if not self.world.graphicsEnabled:
+            return 0
+        self.clearOwIcon()
+        
+        if self.robbyIsHere():
+            if self.contents == "B":
+                newIcon = self.getIcon("robby_battery")
+            elif self.contents == "C":
+                newIcon = self.getIcon("robby_can")
+            else:
+                newIcon = self.getIcon("robby")
+        else:
+            if self.contents == "B":
+                newIcon = self.getIcon("battery")
+            elif self.contents == "C":
+                newIcon = self.getIcon("can")
+            elif self.contents == "W":
+                newIcon = self.getIcon("wall")
+            else:
+                newIcon = None
+        if newIcon is not self.icon:
+            if newIcon is not None:
+                newIcon.draw(self.world)
+            if self.icon is not None:
+                self.icon.undraw()
+            self.icon = newIcon
+
+    def undrawRobby(self):
+        if not self.world.graphicsEnabled:
+            return
+        self.clearOwIcon()
+        if self.contents == "B":
+            newIcon = self.getIcon("battery")
+            newIcon.draw(self.world)
+            self.icon.undraw()
+            self.icon = newIcon
+        elif self.contents == "C":
+            newIcon = self.getIcon("can")
+            newIcon.draw(self.world)
+            self.icon.undraw()
+            self.icon = newIcon
+        elif self.contents == "W":
+            newIcon = self.getIcon("wall")
+            newIcon.draw(self.world)
+            self.icon.undraw()
+            self.icon = newIcon
+        else:
+            self.icon.undraw()
+            self.icon = None
+
+    def crashIntoWall(self, action):
+        # Are graphics enabled?
+        if not self.world.graphicsEnabled:
+            return 0
+
+        # Check if there are any contents in the cell Robby is at
+        if self.contents == "B":
+            item = "_battery"
+        elif self.contents == "C":
+            item = "_can"
+        else:
+            item = ""
+
+        # Check which direction Robby is attempting to move
+        if action == "MoveNorth":
+            direction = "_n"
+        elif action == "MoveSouth":
+            direction = "_s"
+        elif action == "MoveEast":
+            direction = "_e"
+        elif action == "MoveWest":
+            direction = "_w"
+        else:
+            raise Exception("bad crash action: %s" % action)
+
+        # Setup appropriate icons
+        crashIcon = self.getIcon("crash" + item + direction)
+        owIcon = self.getIcon("ow" + direction)
+        if self.icon is not None:
+            self.icon.undraw()
+        if self.owIcon is not None:
+            self.owIcon.undraw()
+        crashIcon.draw(self.world)
+        owIcon.draw(self.world)
+        self.icon = crashIcon
+        self.owIcon = owIcon
+
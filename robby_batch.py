@@ -0,0 +1,223 @@
+# robby_batch.py
+# Solve many of Robby's worlds at once, in parallel and without a window, writing one JSON line per world.
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import traceback
+
+from robby import loadWorld
+from robby.cache import DEFAULT_CACHE_DIRECTORY, SolutionCache
+from robby.engines import ENGINES, solve
+from robby.heuristics import HEURISTICS
+from robby.search import SearchProblem
+
+# Use argparse to allow user to enter command line arguments for:
+#   *paths - world files, or directories to search for world files (required)
+#   *pattern - the file name pattern of world files inside directories (optional, default='*.txt')
+#   *output - the JSONL file to write results to (optional, default: standard output)
+#   *jobs - the number of worker processes (optional, default: one per core)
+#   *actions, battery, engine, heuristic, table, time-limit, max-expansions, workers, memory-limit, profile,
+#    cache, cache-size - as for robby_search.py
+parser = argparse.ArgumentParser(
+    description="Solve a batch of Robby the Robot worlds in parallel and write one JSON result per world"
+)
+parser.add_argument(
+    "paths",
+    help="World files, or directories to search for world files",
+    nargs="+",
+)
+parser.add_argument(
+    "-p",
+    "--pattern",
+    help="File name pattern of world files inside directories (default: '*.txt')",
+    default="*.txt",
+)
+parser.add_argument(
+    "-o",
+    "--output",
+    help="JSONL file to write results to (default: standard output)",
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    help="Number of worker processes (default: one per core)",
+    default=os.cpu_count(),
+    type=int,
+)
+parser.add_argument(
+    "-a",
+    "--actions",
+    help="String defining the order of actions to search (default: 'GNESW')",
+    default="GNESW",
+)
+parser.add_argument(
+    "-b",
+    "--battery",
+    help="Integer defining the full battery power",
+    default=7,
+    type=int,
+)
+parser.add_argument(
+    "-e",
+    "--engine",
+    help="Search engine to run (default: 'bfs')",
+    choices=ENGINES,
+    default="bfs",
+)
+parser.add_argument(
+    "-H",
+    "--heuristic",
+    help="Heuristic for informed engines such as A* (default: 'mst')",
+    choices=HEURISTICS,
+    default="mst",
+)
+parser.add_argument(
+    "-t",
+    "--table",
+    help="Most states kept in the transposition table of iterative-deepening engines (default: 0, none)",
+    default=0,
+    type=int,
+)
+parser.add_argument(
+    "--time-limit",
+    help="Milliseconds an anytime engine may run on each world before returning its best plan",
+    type=int,
+)
+parser.add_argument(
+    "--max-expansions",
+    help="Expansions an anytime engine may make on each world before returning its best plan",
+    type=int,
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    help="Number of worker processes of parallel engines such as pbfs, per world (default: one per core)",
+    type=int,
+)
+parser.add_argument(
+    "-m",
+    "--memory-limit",
+    help="MiB of states an external-memory engine such as ebfs may buffer in memory, per world (default: 64)",
+    type=int,
+)
+parser.add_argument(
+    "-P",
+    "--profile",
+    help="Flag to time successor generation, hashing and goal tests separately (slows the search down)",
+    action="store_true",
+)
+parser.add_argument(
+    "--cache",
+    help="Directory of the solution cache to reuse plans from and add new ones to (default: ~/.cache/robby)",
+    nargs="?",
+    const=DEFAULT_CACHE_DIRECTORY,
+)
+parser.add_argument(
+    "--cache-size",
+    help="Most plans kept in the solution cache (default: 10000)",
+    default=10000,
+    type=int,
+)
+
+
+def main(paths: list, pattern: str, output: str, jobs: int, **options):
+    files = findWorlds(paths, pattern)
+    out = open(output, "w") if output else sys.stdout
+    try:
+        for result in solveAll(files, jobs, **options):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if output:
+            out.close()
+
+
+def findWorlds(paths: list, pattern: str = "*.txt") -> list:
+    """Expand directories into the sorted world files inside them that match pattern."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        else:
+            files.append(path)
+    return files
+
+
+def solveAll(files: list, jobs: int, **options):
+    """Solve every world file across a pool of jobs worker processes and yield one result per file,
+    in the order they finish. A worker that dies takes the pool down with it, so the worlds that
+    were still unsolved are split in two and each half is retried in a fresh pool of jobs workers.
+    Halves that break a pool again are split further, so only a world that breaks a pool on its
+    own is reported as an error, and the rest of the batch keeps every core busy."""
+    # Each world gets a fresh worker so that its peak RSS is its own; a fork server keeps that cheap
+    # (plain fork cannot be combined with max_tasks_per_child)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    batches = [list(files)]
+    while batches:
+        batch = batches.pop()
+        unfinished = []
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batch)), mp_context=context,
+                                 max_tasks_per_child=1) as pool:
+            futures = {}
+            for file in batch:
+                try:
+                    futures[pool.submit(solveWorld, file, **options)] = file
+                except BrokenProcessPool:
+                    unfinished.append(file)
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    unfinished.append(futures[future])
+
+        if len(batch) == 1 and unfinished:
+            yield {"world": batch[0], "engine": options.get("engine", "bfs"), "error": "worker process died"}
+        elif unfinished:
+            middle = (len(unfinished) + 1) // 2
+            batches.extend(half for half in (unfinished[middle:], unfinished[:middle]) if half)
+
+
+def solveWorld(file: str, actions: str = "GNESW", battery: int = 7, engine: str = "bfs", heuristic: str = "mst",
+               table: int = 0, timeLimit: int = None, maxExpansions: int = None, workers: int = None,
+               memoryLimit: int = None, profile: bool = False, cache: str = None, cacheSize: int = 10000) -> dict:
+    """Solve one world file and return its result record. Errors are reported in the record."""
+    result = {"world": file, "engine": engine, "battery": battery, "actions": actions}
+    start = time.perf_counter()
+    try:
+        problem = SearchProblem(loadWorld(file, battery), actions=actions)
+        path, stats = solve(problem, engine, heuristic=heuristic, tableSize=table,
+                            timeLimit=None if timeLimit is None else timeLimit / 1000, maxExpansions=maxExpansions,
+                            workers=workers, memoryLimit=None if memoryLimit is None else memoryLimit * 1024 * 1024,
+                            profile=profile, cache=SolutionCache(cache, cacheSize) if cache else None)
+    except Exception as e:
+        result["error"] = "".join(traceback.format_exception_only(e)).strip()
+        return result
+    result.update({
+        "path": path,
+        "length": len(path),
+        "solved": len(path) > 0 or problem.cans == 0,
+        "wallTime": time.perf_counter() - start,
+        "peakRss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,  # KiB on Linux
+    })
+    result.update((field, value) for field, value in stats.asDict().items() if field != "engine")
+    # Engines that stop at their first plan find it when they finish
+    if result["firstSolution"] is None and path:
+        result["firstSolution"] = stats.elapsed
+    return result
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    main(args.paths, args.pattern, args.output, args.jobs, actions=args.actions, battery=args.battery,
+         engine=args.engine, heuristic=args.heuristic, table=args.table, timeLimit=args.time_limit,
+         maxExpansions=args.max_expansions, workers=args.workers,
+         memoryLimit=args.memory_limit, profile=args.profile, cache=args.cache, cacheSize=args.cache_size)
@@ -0,0 +1,245 @@
+# robby_bench.py
+# Benchmark every search engine on a reproducible suite of generated worlds, writing one JSON line per run.
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from robby import writeWorld
+from robby.engines import ENGINES
+from robby.generate import generateWorld
+from robby.heuristics import HEURISTICS
+from robby_batch import solveWorld
+
+# Use argparse to allow user to enter command line arguments for:
+#   *seed - the seed the suite of worlds is generated from (optional, default=0)
+#   *worlds - the number of worlds generated for every combination of the settings below (optional, default=1)
+#   *sizes, walls, cans, batteries, capacities - comma-separated grid sizes, densities and battery capacities
+#   *engines - comma-separated engines to run (optional, default: all of them)
+#   *heuristic - the heuristic used by informed engines (optional, default='mst')
+#   *timeout - seconds each run may take before it is stopped (optional, default=10)
+#   *output - the JSONL file to write results to (optional, default: standard output)
+#   *label - a name for this version of the code, stored in every result (optional, default: the git commit)
+#   *baseline - a JSONL file of earlier results to compare against (optional)
+parser = argparse.ArgumentParser(
+    description="Benchmark Robby the Robot search engines on a reproducible suite of generated worlds"
+)
+parser.add_argument(
+    "-s",
+    "--seed",
+    help="Seed the suite of worlds is generated from (default: 0)",
+    default=0,
+    type=int,
+)
+parser.add_argument(
+    "-n",
+    "--worlds",
+    help="Number of worlds generated for every combination of settings (default: 1)",
+    default=1,
+    type=int,
+)
+parser.add_argument(
+    "--sizes",
+    help="Comma-separated side lengths of the square grids (default: '4,6,8')",
+    default="4,6,8",
+)
+parser.add_argument(
+    "--walls",
+    help="Comma-separated wall densities (default: '0.1,0.2')",
+    default="0.1,0.2",
+)
+parser.add_argument(
+    "--cans",
+    help="Comma-separated can densities (default: '0.1,0.2')",
+    default="0.1,0.2",
+)
+parser.add_argument(
+    "--batteries",
+    help="Comma-separated battery densities (default: '0.05')",
+    default="0.05",
+)
+parser.add_argument(
+    "--capacities",
+    help="Comma-separated full battery capacities (default: '10,20')",
+    default="10,20",
+)
+parser.add_argument(
+    "-e",
+    "--engines",
+    help="Comma-separated engines to run (default: all of them)",
+    default=",".join(ENGINES),
+)
+parser.add_argument(
+    "-H",
+    "--heuristic",
+    help="Heuristic for informed engines such as A* (default: 'mst')",
+    choices=HEURISTICS,
+    default="mst",
+)
+parser.add_argument(
+    "--timeout",
+    help="Seconds each run may take before it is stopped (default: 10)",
+    default=10.0,
+    type=float,
+)
+parser.add_argument(
+    "-o",
+    "--output",
+    help="JSONL file to write results to (default: standard output)",
+)
+parser.add_argument(
+    "-l",
+    "--label",
+    help="Name for this version of the code, stored in every result (default: the current git commit)",
+)
+parser.add_argument(
+    "--baseline",
+    help="JSONL file of earlier results to compare against",
+)
+
+
+def main(seed: int, worlds: int, sizes: list, walls: list, cans: list, batteries: list, capacities: list,
+         engines: list, heuristic: str = "mst", timeout: float = 10.0, output: str = None, label: str = None,
+         baseline: str = None):
+    for engine in engines:
+        if engine not in ENGINES:
+            raise SystemExit(f"unknown engine: {engine}")
+    label = label or gitCommit()
+    results = []
+    out = open(output, "w") if output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory(prefix="robby-bench-") as directory:
+            for settings in suite(seed, worlds, sizes, walls, cans, batteries):
+                file = os.path.join(directory, worldName(settings))
+                writeWorld(file, *generateWorld(settings["size"], settings["size"], settings["walls"], settings["cans"],
+                                                settings["batteries"], settings["seed"], start=(0, 0), reachable=True))
+                for capacity, engine in itertools.product(capacities, engines):
+                    result = dict(settings, capacity=capacity, label=label,
+                                  **runWithTimeout(timeout, file, battery=capacity, engine=engine, heuristic=heuristic))
+                    result["world"] = worldName(settings)
+                    result.pop("path", None)
+                    if result.get("elapsed"):
+                        result["nodesPerSecond"] = result["expansions"] / result["elapsed"]
+                    results.append(result)
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+    finally:
+        if output:
+            out.close()
+
+    summarize(results)
+    if baseline:
+        with open(baseline) as f:
+            compare([json.loads(line) for line in f if line.strip()], results)
+
+
+def suite(seed: int, worlds: int, sizes: list, walls: list, cans: list, batteries: list):
+    """Yield the settings (size, densities and seed) of every world in the suite, in a fixed order."""
+    rng = random.Random(seed)
+    for size, wallDensity, canDensity, batteryDensity in itertools.product(sizes, walls, cans, batteries):
+        for i in range(worlds):
+            yield {"size": size, "walls": wallDensity, "cans": canDensity, "batteries": batteryDensity,
+                   "seed": rng.getrandbits(32)}
+
+
+def worldName(settings: dict) -> str:
+    return "{size}x{size}-w{walls}-c{cans}-b{batteries}-{seed}.txt".format(**settings)
+
+
+def runWithTimeout(timeout: float, file: str, **options) -> dict:
+    """Solve a world file in a fresh process and return its result record, or a timeout record if the
+    search takes longer than timeout seconds."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_solveAndSend, args=(sender, file), kwargs=options)
+    process.start()
+    sender.close()
+    if receiver.poll(timeout):
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = {"engine": options.get("engine", "bfs"), "battery": options.get("battery"),
+                      "error": "worker process died"}
+    else:
+        result = {"engine": options.get("engine", "bfs"), "battery": options.get("battery"), "timeout": timeout}
+    # Kill the run's whole process group, so workers of parallel engines go with it
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError):
+        # No process groups (Windows), or the child has not made its own yet: kill just the child
+        process.kill()
+    process.join()
+    return result
+
+
+def _solveAndSend(connection, file, **options):
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)
+    connection.send(solveWorld(file, **options))
+
+
+def gitCommit() -> str:
+    """Return the short hash of the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(results: list):
+    """Print, for every engine and grid size, how many runs were solved and the median search speed and time."""
+    print(f"{'engine':>10} {'size':>5} {'solved':>8} {'nodes/s':>10} {'time (s)':>10} {'peak RSS':>10}",
+          file=sys.stderr)
+    for (engine, size), runs in itertools.groupby(sorted(results, key=lambda r: (r["engine"], r["size"])),
+                                                  key=lambda r: (r["engine"], r["size"])):
+        runs = list(runs)
+        finished = [run for run in runs if "elapsed" in run]
+        speed = statistics.median([run.get("nodesPerSecond", 0) for run in finished]) if finished else 0
+        elapsed = statistics.median([run["elapsed"] for run in finished]) if finished else float("nan")
+        rss = max([run["peakRss"] for run in finished], default=0)
+        solved = sum(1 for run in runs if run.get("solved"))
+        print(f"{engine:>10} {size:>5} {solved:>3}/{len(runs):<4} {speed:>10.0f} {elapsed:>10.4f} {rss:>8}Ki",
+              file=sys.stderr)
+
+
+def compare(baseline: list, results: list):
+    """Print, for every engine, the median ratios of search speed and time to those of the baseline runs of
+    the same worlds, and every run whose plan length changed."""
+    earlier = {(run["world"], run.get("capacity"), run["engine"]): run for run in baseline}
+    ratios = {}
+    for run in results:
+        old = earlier.get((run["world"], run.get("capacity"), run["engine"]))
+        if old is None or "elapsed" not in old or "elapsed" not in run:
+            continue
+        if old["length"] != run["length"]:
+            print(f"plan length changed: {run['engine']} on {run['world']} at battery {run['capacity']}: "
+                  f"{old['length']} -> {run['length']}", file=sys.stderr)
+        if old.get("nodesPerSecond") and run.get("nodesPerSecond") and old["elapsed"] > 0:
+            ratios.setdefault(run["engine"], []).append(
+                (run["nodesPerSecond"] / old["nodesPerSecond"], run["elapsed"] / old["elapsed"]))
+    label = baseline[0].get("label") if baseline else None
+    for engine, pairs in sorted(ratios.items()):
+        print("{}: {:.3g}x nodes/s, {:.3g}x time relative to {} ({} runs)".format(
+            engine, statistics.median(p[0] for p in pairs), statistics.median(p[1] for p in pairs),
+            label or "baseline", len(pairs)), file=sys.stderr)
+
+
+def _numbers(text: str, kind=float) -> list:
+    return [kind(value) for value in text.split(",") if value]
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    main(args.seed, args.worlds, _numbers(args.sizes, int), _numbers(args.walls), _numbers(args.cans),
+         _numbers(args.batteries), _numbers(args.capacities, int), args.engines.split(","), args.heuristic,
+         args.timeout, args.output, args.label, args.baseline)
@@ -0,0 +1,110 @@
+# robby_generate.py
+# Generate random worlds for Robby the Robot, reproducibly from a seed, in the text format robby_search.py reads.
+
+import argparse
+import os
+
+from robby import writeWorld
+from robby.engines import ENGINES
+from robby.generate import generateWorlds
+
+# Use argparse to allow user to enter command line arguments for:
+#   *rows, cols - the size of every world (required)
+#   *count - the number of worlds to generate (optional, default=1)
+#   *seed - the seed the worlds are generated from (optional, default: a different one every run)
+#   *walls, cans, batteries - the probability that a cell holds each item (optional)
+#   *reachable - a flag to remove the cans and batteries Robby cannot walk to
+#   *solvable - only keep worlds that can be solved with this full battery (optional)
+#   *engine - the search engine used to check solvability (optional, default='astar')
+#   *output - the directory to write the worlds to (optional, default='.')
+#   *prefix - the start of every file name (optional, default='world')
+parser = argparse.ArgumentParser(
+    description="Generate random worlds for Robby the Robot"
+)
+parser.add_argument(
+    "rows",
+    help="Number of rows of every world",
+    type=int,
+)
+parser.add_argument(
+    "cols",
+    help="Number of columns of every world",
+    type=int,
+)
+parser.add_argument(
+    "-n",
+    "--count",
+    help="Number of worlds to generate (default: 1)",
+    default=1,
+    type=int,
+)
+parser.add_argument(
+    "-s",
+    "--seed",
+    help="Seed the worlds are generated from (default: a different one every run)",
+    type=int,
+)
+parser.add_argument(
+    "--walls",
+    help="Probability that a cell holds a wall (default: 0.1)",
+    default=0.1,
+    type=float,
+)
+parser.add_argument(
+    "--cans",
+    help="Probability that a cell holds a can (default: 0.2)",
+    default=0.2,
+    type=float,
+)
+parser.add_argument(
+    "--batteries",
+    help="Probability that a cell holds a battery (default: 0.05)",
+    default=0.05,
+    type=float,
+)
+parser.add_argument(
+    "-r",
+    "--reachable",
+    help="Flag to remove the cans and batteries Robby cannot walk to",
+    action="store_true",
+)
+parser.add_argument(
+    "--solvable",
+    help="Only keep worlds that can be solved with this full battery",
+    type=int,
+)
+parser.add_argument(
+    "-e",
+    "--engine",
+    help="Search engine used to check solvability (default: 'astar')",
+    choices=ENGINES,
+    default="astar",
+)
+parser.add_argument(
+    "-o",
+    "--output",
+    help="Directory to write the worlds to (default: '.')",
+    default=".",
+)
+parser.add_argument(
+    "-p",
+    "--prefix",
+    help="Start of every file name (default: 'world')",
+    default="world",
+)
+
+
+def main(rows: int, cols: int, count: int, seed: int, output: str, prefix: str, **options):
+    os.makedirs(output, exist_ok=True)
+    width = len(str(count - 1))
+    for i, world in enumerate(generateWorlds(count, rows, cols, seed, **options)):
+        writeWorld(os.path.join(output, f"{prefix}{i:0{width}d}.txt"), *world)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    try:
+        main(args.rows, args.cols, args.count, args.seed, args.output, args.prefix, walls=args.walls, cans=args.cans,
+             batteries=args.batteries, reachable=args.reachable, battery=args.solvable, engine=args.engine)
+    except ValueError as e:
+        parser.error(str(e))
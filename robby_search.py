@@ -1,19 +1,45 @@
 # robby_search.py
 # Use breadth-first search (BFS) to help Robby the Robot pick up cans without running out of battery.
+# Other engines (A*, macro-actions, Held-Karp, IDA*, ...) are available too; see robby/engines.py.
 
 import argparse
-from collections import deque
 import pdb
-from queue import Queue
-from robby.graphics import *
-from robby import World
+from robby import WorldModel, readWorld
+from robby.background import BackgroundSearch
+from robby.cache import DEFAULT_CACHE_DIRECTORY, SolutionCache
+from robby.engines import ENGINES, TRACED_ENGINES, solve
+from robby.heuristics import HEURISTICS
+from robby.search import SearchProblem
 import time
 
+# Milliseconds between actions when Robby replays a plan
+REPLAY_DELAY = 500
+
+# Milliseconds between checks on a search running in the background
+PROGRESS_DELAY = 50
+
+# Most times a second the search heatmap is redrawn
+HEATMAP_RATE = 5
+
 # Use argparse to allow user to enter command line arguments for:
 #   *file - a text file containing the world design (required)
 #   *actions - a string defining the order of actions to search (optional, default='GNESW')
 #   *battery - an integer defining the full battery power (optional, default=7)
 #   *verbose - a flag to display details about the search
+#   *engine - the search engine to run when 'b' is pressed (optional, default='bfs')
+#   *heuristic - the heuristic used by informed engines (optional, default='mst')
+#   *compare - a flag to also run BFS and report the engine's expansions and time relative to it
+#   *table - the most states kept in the transposition table of iterative-deepening engines (optional, default=0)
+#   *time-limit - milliseconds an anytime engine may run before returning its best plan (optional)
+#   *max-expansions - expansions an anytime engine may make before returning its best plan (optional)
+#   *workers - the number of worker processes of parallel engines (optional, default: one per core)
+#   *memory-limit - the MiB of states an external-memory engine may buffer in memory (optional, default=64)
+#   *profile - a flag to time successor generation, hashing and goal tests separately (slows the search down)
+#   *trace - a file to write sampled expansions of the search to (optional; bfs, astar, macro, iddfs and idastar)
+#   *trace-every, trace-first, trace-last - which expansions to sample (optional, default: every 1000th)
+#   *cache - a directory to reuse plans from and save new plans to (optional, default: no cache)
+#   *cache-size - the most plans kept in the cache (optional, default=10000)
+#   *heatmap - a flag to shade every cell by how many states with Robby in it the search has expanded
 parser = argparse.ArgumentParser(
     description="Use breadth-first search (BFS) to help Robby the Robot pick up cans without running out of battery"
 )
@@ -41,142 +67,315 @@ parser.add_argument(
     help="Flag to display details about the search",
     action="store_true",
 )
+parser.add_argument(
+    "-e",
+    "--engine",
+    help="Search engine to run (default: 'bfs')",
+    choices=ENGINES,
+    default="bfs",
+)
+parser.add_argument(
+    "-H",
+    "--heuristic",
+    help="Heuristic for informed engines such as A* (default: 'mst')",
+    choices=HEURISTICS,
+    default="mst",
+)
+parser.add_argument(
+    "-c",
+    "--compare",
+    help="Flag to also run BFS and report expansions and time relative to it",
+    action="store_true",
+)
+parser.add_argument(
+    "-t",
+    "--table",
+    help="Most states kept in the transposition table of iterative-deepening engines (default: 0, none)",
+    default=0,
+    type=int,
+)
+parser.add_argument(
+    "--time-limit",
+    help="Milliseconds an anytime engine may run before returning its best plan",
+    type=int,
+)
+parser.add_argument(
+    "--max-expansions",
+    help="Expansions an anytime engine may make before returning its best plan",
+    type=int,
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    help="Number of worker processes of parallel engines such as pbfs (default: one per core)",
+    type=int,
+)
+parser.add_argument(
+    "-m",
+    "--memory-limit",
+    help="MiB of states an external-memory engine such as ebfs may buffer in memory (default: 64)",
+    type=int,
+)
+parser.add_argument(
+    "-P",
+    "--profile",
+    help="Flag to time successor generation, hashing and goal tests separately (slows the search down)",
+    action="store_true",
+)
+parser.add_argument(
+    "--trace",
+    help="File to write sampled expansions of the search to, one tab-separated line each "
+         "(bfs, astar, macro, iddfs and idastar only)",
+)
+parser.add_argument(
+    "--trace-every",
+    help="Record every Nth expansion in the trace (default: 1000)",
+    default=1000,
+    type=int,
+)
+parser.add_argument(
+    "--trace-first",
+    help="Record the first K expansions in the trace (default: 0)",
+    default=0,
+    type=int,
+)
+parser.add_argument(
+    "--trace-last",
+    help="Record the last K expansions in the trace (default: 0; slows the search down)",
+    default=0,
+    type=int,
+)
+parser.add_argument(
+    "--cache",
+    help="Directory of the solution cache to reuse plans from and add new ones to (default: ~/.cache/robby)",
+    nargs="?",
+    const=DEFAULT_CACHE_DIRECTORY,
+)
+parser.add_argument(
+    "--cache-size",
+    help="Most plans kept in the solution cache (default: 10000)",
+    default=10000,
+    type=int,
+)
+parser.add_argument(
+    "--heatmap",
+    help="Flag to shade every cell by how many states with Robby in it the search has expanded",
+    action="store_true",
+)
 
 
-def main(file: str, actions: str, battery: int, verbose: bool):
+def main(file: str, actions: str, battery: int, verbose: bool, engine: str = "bfs", heuristic: str = "mst",
+         compare: bool = False, table: int = 0, timeLimit: int = None, maxExpansions: int = None,
+         workers: int = None, memoryLimit: int = None, profile: bool = False, trace: str = None,
+         traceEvery: int = 1000, traceFirst: int = 0, traceLast: int = 0, cache: str = None, cacheSize: int = 10000,
+         heatmap: bool = False):
     # Read world parameters (size, location of Robby, and contents) from file
     # ***EDIT CODE HERE***
-    lines = open(file, "r").readlines()
-    rows, cols = [int(char) for char in lines[0].strip().split(" ")]
-    r0, c0 = [int(char) for char in lines[1].strip().split(" ")]
-    contents = "".join([line.strip() for line in lines[2:]]).replace(".", "E")
+    rows, cols, r0, c0, contents = readWorld(file)
 
-    # Create Robby's world
+    # Create Robby's world (the Tk view is only needed for the interactive game)
     # ***EDIT CODE HERE***
+    from robby import World
+
     rw = World(rows, cols)
     rw.graphicsOn()
     rw.load(contents)
     rw.goto(r0, c0)
     rw.setFullBattery(battery)
+    solutions = SolutionCache(cache, cacheSize) if cache else None
 
-    # Play in Robby's world
+    # Play in Robby's world: key presses are handled as Tk delivers them, and a replayed plan
+    # is stepped with after(), so nothing runs while Robby waits for a key. Searches run in
+    # a child process and are checked on with after(), so the window stays live meanwhile.
     path = ""
-    while True:
+    replay = None  # the after() id of the next replayed action, while a plan is being replayed
+    searching = None  # the BackgroundSearch started with 'b', while it runs
+    shown = (None, 0)  # the expansions per cell last shown on the heatmap, and when
+
+    def checkWin():
         # Check to see if Robby has picked up all the cans
         if rw.getCansRemaining() <= 0:  # ***EDIT CODE HERE***
             rw.graphicsOff("Robby wins!")
 
-        # Handle key presses
-        key = rw.checkKey()
-        if key:
-            if key == "Escape":
-                break
-            elif key == "Up":
-                rw.north()
-            elif key == "Down":
-                rw.south()
-            elif key == "Right":
-                rw.east()
-            elif key == "Left":
-                rw.west()
-            elif key == "space":
-                rw.grab()
-            elif key == "d":  # debug
+    def stopReplay():
+        nonlocal replay
+        if replay is not None:
+            rw.after_cancel(replay)
+            replay = None
+
+    def replayFrom(i: int):
+        # Take the i-th action of the path, then schedule the next one
+        nonlocal replay
+        replay = None
+        if i >= len(path):
+            return
+        # ***EDIT CODE HERE***
+        action = path[i]
+        if action == "N":
+            rw.north()
+        elif action == "S":
+            rw.south()
+        elif action == "E":
+            rw.east()
+        elif action == "W":
+            rw.west()
+        elif action == "G":
+            rw.grab()
+        checkWin()
+        replay = rw.after(REPLAY_DELAY, replayFrom, i + 1)
+
+    def showProgress():
+        # Show the search's progress where the score and battery life usually are
+        text = f"SEARCHING {searching.elapsed:.1f} s"
+        if searching.progress is None:
+            rw.topLeftText.setText(text)
+            rw.bottomLeftText.setText("PRESS c TO CANCEL")
+        else:
+            expansions, rate, frontier, depth = searching.progress
+            rw.topLeftText.setText(f"{text}: {expansions} STATES ({rate:.0f}/s)")
+            rw.bottomLeftText.setText(f"FRONTIER = {frontier}, DEPTH = {depth}")
+
+    def showHeatmap(final: bool = False):
+        # Redraw the heatmap when new counts have come in, at most HEATMAP_RATE times a second
+        nonlocal shown
+        positions, now = searching.positions, time.perf_counter()
+        if positions is not None and positions is not shown[0] and (final or now - shown[1] >= 1 / HEATMAP_RATE):
+            rw.showHeatmap(positions)
+            shown = (positions, now)
+
+    def checkSearch():
+        nonlocal path, searching
+        if searching is None:  # cancelled
+            return
+        searching.poll()
+        if searching.running:
+            showProgress()
+            showHeatmap()
+            rw.after(PROGRESS_DELAY, checkSearch)
+            return
+        showHeatmap(final=True)
+        finished, searching = searching, None
+        rw.updateScore()
+        rw.updateBatteryLife()
+        if finished.error is not None:
+            print(f"search failed: {finished.error}")
+            return
+        path, stats, baseline, cacheCounts = finished.result
+        if len(path) > 0:
+            print(path)
+        else:
+            print("No solution found.")
+        if stats.lowerBound is not None:
+            print(f"Proven lower bound on the plan length: {stats.lowerBound}")
+        if cacheCounts is not None:
+            solutions.hits, solutions.misses = cacheCounts
+        if stats.cached:
+            print(f"(from the solution cache: {solutions.hits} hits, {solutions.misses} misses)")
+        if verbose or profile:
+            print(stats.report())
+        if baseline is not None:
+            print(stats.compare(baseline))
+
+    def stopSearch():
+        nonlocal searching
+        if searching is not None:
+            searching.cancel()
+            searching = None
+            rw.updateScore()
+            rw.updateBatteryLife()
+            print("cancelled.")
+
+    def onKey(key: str):
+        nonlocal path, replay, searching
+        if key == "Escape":
+            stopReplay()
+            stopSearch()
+            rw.close()
+        elif key == "Up":
+            rw.north()
+        elif key == "Down":
+            rw.south()
+        elif key == "Right":
+            rw.east()
+        elif key == "Left":
+            rw.west()
+        elif key == "space":
+            rw.grab()
+        elif key == "d":  # debug
+            # The event loop waits while pdb runs, so draw changes made from the prompt straight away
+            autoflush, rw.autoflush = rw.autoflush, True
+            try:
                 pdb.set_trace()
-            elif key == "r":  # reset the world
-                rw.reset()
-                rw.goto(r0, c0)
-                rw.graphicsOn()
-            elif key == "s":  # display the current world at the command line
-                rw.show()
-            elif key == "b":  # BFS
-                print("Running breadth-first search...", end="")
-                time.sleep(0.5)
-                path = bfs(rw, contents, actions, verbose=verbose)
-                if len(path) > 0:
-                    print(path)
-                else:
-                    print("No solution found.")
-            elif key == "Return":
-                # Use the discovered path (from bfs) to actually move robby through
-                # the world! Add a small time delay with time.sleep() so that robby does not move too fast.
-                rw.reset()
-                rw.goto(r0, c0)
-                time.sleep(0.5)
-
-                # ***EDIT CODE HERE***
-                for action in path:
-                    time.sleep(0.5)
-                    if action == "N":
-                        rw.north()
-                    elif action == "S":
-                        rw.south()
-                    elif action == "E":
-                        rw.east()
-                    elif action == "W":
-                        rw.west()
-                    elif action == "G":
-                        rw.grab()
-
-
-def bfs(rw: World, state: str, actions: str, verbose: bool = False) -> str:
+            finally:
+                rw.autoflush = autoflush
+        elif key == "r":  # reset the world
+            stopReplay()
+            rw.hideHeatmap()
+            rw.reset()
+            rw.goto(r0, c0)
+            rw.graphicsOn()
+        elif key == "s":  # display the current world at the command line
+            rw.show()
+        elif key == "b" and searching is None:  # BFS (or the engine chosen with --engine)
+            print(f"Running {engine} search (press c to cancel)...", end="", flush=True)
+            # Sample the search into the trace file, if any, and show its progress if verbose
+            rw.hideHeatmap()
+            searching = BackgroundSearch(SearchProblem(rw, contents, actions), engine, verbose,
+                                         (trace, traceEvery, traceFirst, traceLast) if trace else None, compare,
+                                         heatmap, heuristic=heuristic, tableSize=table,
+                                         timeLimit=None if timeLimit is None else timeLimit / 1000,
+                                         maxExpansions=maxExpansions, workers=workers,
+                                         memoryLimit=None if memoryLimit is None else memoryLimit * 1024 * 1024,
+                                         profile=profile, cache=solutions)
+            showProgress()
+            rw.after(PROGRESS_DELAY, checkSearch)
+        elif key == "c":  # cancel the search
+            stopSearch()
+        elif key == "Return":
+            # Use the discovered path (from bfs) to actually move robby through the world!
+            # Actions are REPLAY_DELAY milliseconds apart so that robby does not move too fast.
+            stopReplay()
+            rw.reset()
+            rw.goto(r0, c0)
+            replay = rw.after(REPLAY_DELAY, replayFrom, 0)
+        if not rw.isClosed():
+            checkWin()
+
+    checkWin()
+    rw.setKeyHandler(onKey)
+    try:
+        rw.mainloop()
+    finally:
+        # The window may have been closed, or Ctrl-C pressed, with a search still running
+        stopReplay()
+        stopSearch()
+
+
+def bfs(rw: WorldModel, state: str, actions: str, verbose: bool = False) -> str:
     """Perform breadth-first search on the world state given an ordered string of actions to check (e.g. 'GNESW')."""
     # ***EDIT CODE HERE***
-    path = ""
-    cnt = 0  # counter to see how long the search took
-    row, col = rw.getCurrentPosition()  # Robby's current (starting) position
-    rows, cols = rw.numRows, rw.numCols  # Number of rows and columns in the world
-
-    visited = []  # Initialize the list of visited nodes
-
-    queue = Queue()  # Initialize the queue
-
-    # Add starting node to queue and visited nodes
-    queue.put(("", row, col, state))
-    visited.append((row, col, state))
-
-    while not queue.empty():
-        node = queue.get()  # Pop the first node from the queue
-        if verbose:
-            print(f"Exploring paths from {node[0]}...")
-        visited.append((node[1], node[2], node[3]))
-        cnt += 1  # Increase our search length count
-        temp_path = node[0]
-
-        # If the node contains the goal state then return the solution
-        if issolved(rw, state, temp_path):
-            path = temp_path
-            break
-
-        # For each available action
-        for action in actions:
-            # Determine the child node for the given action
-            # print(f'\nCurrent position: ({node[1]}, {node[2]})')
-            if isvalid(rw, state, temp_path + action):
-                child = ()
-                if action == "N":
-                    child = (temp_path + action, node[1] - 1, node[2], state)
-                elif action == "E":
-                    child = (temp_path + action, node[1], node[2] + 1, state)
-                elif action == "S":
-                    child = (temp_path + action, node[1] + 1, node[2], state)
-                elif action == "W":
-                    child = (temp_path + action, node[1], node[2] - 1, state)
-                elif action == "G":
-                    new_state = list(node[3])
-                    position = node[1] * cols + node[2]
-                    new_state[position] = "E"
-                    child = (temp_path + action, node[1], node[2], "".join(new_state))
-                if child not in visited:
-                    queue.put(child)
-
-    if verbose:
-        print("--> searched {} paths".format(cnt))
+    path, stats = search(rw, state, actions, "bfs", verbose=verbose)
+    return path
 
+
+def astar(rw: WorldModel, state: str, actions: str, heuristic: str = "mst", verbose: bool = False) -> str:
+    """Perform A* search on the world state with an admissible heuristic ('zero', 'farthest' or 'mst')."""
+    path, stats = search(rw, state, actions, "astar", heuristic, verbose=verbose)
     return path
 
 
-def issolved(rw: World, state: str, path: str) -> bool:
+def search(rw: WorldModel, state: str, actions: str, engine: str = "bfs", heuristic: str = "mst",
+           verbose: bool = False, tableSize: int = 0, timeLimit: int = None, maxExpansions: int = None,
+           workers: int = None, memoryLimit: int = None, profile: bool = False, cache: SolutionCache = None):
+    """Run one of the engines in robby.engines.ENGINES on the world state and return (path, stats).
+    timeLimit is in milliseconds and memoryLimit in MiB. verbose may also be a robby.trace.Tracer."""
+    problem = SearchProblem(rw, state, actions)
+    return solve(problem, engine, verbose, heuristic, tableSize,
+                 None if timeLimit is None else timeLimit / 1000, maxExpansions, workers,
+                 None if memoryLimit is None else memoryLimit * 1024 * 1024, profile, cache)
+
+
+def issolved(rw: WorldModel, state: str, path: str) -> bool:
     """Check whether a series of actions (path) taken in Robby's world results in a solved problem."""
     row, col = rw.getCurrentPosition()  # Robby's current (starting) position
     rows, cols = rw.numRows, rw.numCols
@@ -205,7 +404,7 @@ def issolved(rw: World, state: str, path: str) -> bool:
     return False  # if we made it this far, we did not complete the goal
 
 
-def isvalid(rw: World, state: str, path: str) -> bool:
+def isvalid(rw: WorldModel, state: str, path: str) -> bool:
     """Check whether a series of actions (path) taken in Robby's world is valid."""
     rows, cols = rw.numRows, rw.numCols  # size of the maze
 
@@ -259,4 +458,9 @@ def isvalid(rw: World, state: str, path: str) -> bool:
 
 if __name__ == "__main__":
     args = parser.parse_args()
-    main(args.file, args.actions, args.battery, args.verbose)
+    if args.trace and args.engine not in TRACED_ENGINES:
+        parser.error(f"--trace is not supported by the {args.engine} engine")
+    main(args.file, args.actions, args.battery, args.verbose, args.engine, args.heuristic, args.compare, args.table,
+         args.time_limit, args.max_expansions, args.workers,
+         args.memory_limit, args.profile, args.trace, args.trace_every, args.trace_first, args.trace_last,
+         args.cache, args.cache_size, args.heatmap)